@@ -0,0 +1,16 @@
+# Parsing and checking of the LV cavern mappings. The top-level scripts
+# (check_mappings.py, parseXls.py) and `python -m lv_mapping` are thin entry
+# points into the modules here:
+#   cavern_xls     - parse the DCB/hybrid sheets of the formatted cavern mapping
+#   parse_xls      - write the software-readable cavern mappings to output/
+#   check_mappings - check (and fix) the cavern mapping vs the other mappings
+#   batch          - check many revisions of the cavern mapping, with a summary
+#   benchmark      - timings of the checks on synthetic (replicated) mappings
+#   swap_planner   - plan the Positronic swaps that best fix the cavern mapping
+#   query          - local HTTP/JSON query service on the corrected mapping
+#   profiling      - stage timers/counters for the -profile option
+#   revision_diff  - changelog between two revisions of the cavern mapping
+#   run_store      - per-sheet results for the incremental check_mappings mode
+#   xls_cache      - on-disk cache for the workbook sheets (and netlists)
+#   session        - the inputs parsed so far in this process (each parsed once)
+# pandas is only imported by the parts that actually read/write workbooks.
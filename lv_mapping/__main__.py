@@ -0,0 +1,51 @@
+# python -m lv_mapping <command> [args...]
+#   check   <args of check_mappings.py>
+#   parse   <args of parseXls.py>
+#   diff    <old cavern mapping> <new cavern mapping> (-o <changelog>)
+#   batch   <nominal> <cavern mappings or globs> (-compare) (-lines) - check many revisions, with a summary
+#   bench   (-scales 1 10 100) (-o <results json>) - time the checks on synthetic mappings
+#   plan    <nominal> <cavern> (-side C A) (-o <swap workbook>) - plan the Positronic swaps
+#   serve   <nominal> <cavern> (-swap <swap>) (-side C A) (-port 8765) - serve the corrected mapping for queries
+#   netlist <netlist> - print the LVR ch -> load map of one of Phoebe's netlists
+import sys
+
+def netlist(argv):
+    from .check_mappings import parse_netlist
+    if len(argv) != 1:
+        print('usage: python -m lv_mapping netlist <netlist>')
+        return 1
+    for lvr_ch, load in parse_netlist(argv[0]).items(): print(f'{lvr_ch},{load}')
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    commands = ['check', 'parse', 'diff', 'batch', 'bench', 'plan', 'serve', 'netlist']
+    if not argv or not argv[0] in commands:
+        print(f'usage: python -m lv_mapping {{{",".join(commands)}}} [args...]')
+        return 1
+    command, argv = argv[0], argv[1:]
+    # only import what the command needs
+    if command == 'check':
+        from .check_mappings import main as check
+        return check(argv)
+    if command == 'parse':
+        from .parse_xls import main as parse
+        return parse(argv)
+    if command == 'diff':
+        from .revision_diff import main as diff
+        return diff(argv)
+    if command == 'batch':
+        from .batch import main as batch
+        return batch(argv)
+    if command == 'bench':
+        from .benchmark import main as bench
+        return bench(argv)
+    if command == 'plan':
+        from .swap_planner import main as plan
+        return plan(argv)
+    if command == 'serve':
+        from .query import main as serve
+        return serve(argv)
+    return netlist(argv)
+
+if __name__ == '__main__':
+    sys.exit(main())
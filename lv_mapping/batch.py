@@ -0,0 +1,159 @@
+# Batch check of several revisions (or candidates) of the cavern mapping, to
+# see which one is cleanest. The nominal mapping (and, with -lines, Phoebe's
+# schematics) are only parsed once, then each revision is checked for typos
+# and, if it has none, checked and fixed like check_mappings does, with one
+# worker process per revision (if there's more than one). Each revision gets
+# its own reports in fixme/<revision>/ and output/<revision>/ (its printout
+# is in fixme/<revision>/check_mappings.log), and the error counts of all the
+# revisions are collected in one summary table, cleanest first.
+#
+# python -m lv_mapping batch <nominal> <cavern mappings or globs>
+#     (-compare) (-lines) (-side C A) (-o fixme/revisions_summary.csv)
+
+import os, re, io, csv, copy, glob, contextlib
+import concurrent.futures
+from argparse import ArgumentParser
+from . import xls_cache, session
+from . import check_mappings as cm
+
+# the cavern mappings given (files or globs), without the workbooks that have
+# no DCB/hybrid sheets (eg. formatted_cavern/swap_positronic.xlsx for a glob
+# of formatted_cavern/*.xlsx)
+def revision_files(patterns):
+    files = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        if not matches: print(f'No cavern mapping matches {pattern}')
+        for file in matches:
+            if file in files: continue
+            if not cm.cavern_sheets(xls_cache.sheet_names(file)):
+                print(f'Skipping {file}: no DCB/hybrid sheets')
+                continue
+            files.append(file)
+    return files
+
+# name of each revision (for its fixme/output subdirectories): the file name,
+# without the part that all the revisions share (eg. the
+# 'LVR_PPP_Underground_Mapping_PPPSorted_Samtec_cables__' of the dated ones)
+def revision_names(files):
+    names = [os.path.splitext(os.path.basename(file))[0] for file in files]
+    if len(names) > 1:
+        # only cut at a separator (so '01-04-22' and '03-01-23' keep their '0')
+        prefix = re.match(r'.*[_\- ]|', os.path.commonprefix(names)).group()
+        short = [name[len(prefix):] for name in names]
+        if all(short): names = short
+    if len(set(names)) < len(names): # same file name in different folders
+        names = [f'{name}_{i}' for i, name in enumerate(names)]
+    return names
+
+# settings of check_mappings (module globals) and parsed inputs shared by the
+# worker processes, handed over when they start. a worker checks its revision
+# (its sides, Petr's files, ...) without starting pools of its own
+shared_inputs = None
+
+def apply_settings(settings):
+    for setting, value in settings.items(): setattr(cm, setting, value)
+
+def start_worker(settings, inputs):
+    global shared_inputs
+    apply_settings(settings)
+    shared_inputs = inputs
+    session.in_pool = True
+
+# check one revision (in a worker process, if there are several); returns the number of typos and the
+# error counts of each side (empty if the typos kept it from being checked)
+def check_revision(name, file):
+    cm.cavern = file
+    cm.parse_func[file] = cm.parse_cavern # whatever the file is called
+    cm.fixme_dir = os.path.join('fixme', name)
+    cm.output_dir = os.path.join('output', name)
+    cm.alex_dir = cm.fixme_dir
+    for folder in [cm.fixme_dir, cm.output_dir]: os.makedirs(folder, exist_ok=True)
+    # the checks set the LVR info of the matched nominal lines, so each
+    # revision gets its own copy of them
+    nominal_lines, schem_table = shared_inputs
+    nominal_lines = copy.deepcopy(nominal_lines)
+    printout = io.StringIO()
+    with contextlib.redirect_stdout(printout):
+        typos = cm.cavern_typo_check(nominal_lines)
+        errors = {}
+        if typos==0: errors = cm.cavern_check_fix(nominal_lines, schem_table)
+    with open(os.path.join(cm.fixme_dir, 'check_mappings.log'), 'w') as f:
+        f.write(printout.getvalue())
+    return typos, errors
+
+# the summary table (header first): one row per revision, with the typos and
+# the errors of each kind on each side, cleanest revision first. the
+# revisions with typos weren't checked any further, so they go last
+def summary_rows(names, files, results, kinds):
+    header = ['Revision', 'File', 'Typos'] + [f'{x} {kind}' for x in cm.sides
+                                              for kind in kinds] + ['Total']
+    rows = []
+    for name, file, (typos, errors) in zip(names, files, results):
+        counts = [errors[x][kind] if errors else '' for x in cm.sides for kind in kinds]
+        total = typos + sum(count for count in counts if count != '')
+        rows.append([name, file, typos] + counts + [total])
+    rows.sort(key=lambda r: (r[2] > 0, r[-1]))
+    return [header] + rows
+
+def print_table(rows):
+    widths = [max(len(str(row[i])) for row in rows) for i in range(len(rows[0]))]
+    for row in rows:
+        print('  '.join(f'{str(value):{width}}' for value, width in
+                        zip(row, widths)).rstrip())
+
+def main(argv=None):
+    global shared_inputs # a single revision is checked in this process
+    parser = ArgumentParser(description='Check several cavern mapping revisions, and summarize their errors')
+    parser.add_argument('nominal', help='specify nominal mapping to be used as input')
+    parser.add_argument('caverns', nargs='+', help='specify the cavern mappings to be checked (files or globs)')
+    parser.add_argument('-compare', action='store_true', help='also check Petr\'s label files in compare')
+    parser.add_argument('-lines', action='store_true', help='also check the cavern mapping LVR-load')
+    parser.add_argument('-side', nargs='+', choices=['C', 'A'], default=['C'], help='specify the sides to check (C and/or A)')
+    parser.add_argument('-out', '-o', default='fixme/revisions_summary.csv', help='specify the summary file')
+    args = parser.parse_args(argv)
+
+    files = revision_files(args.caverns)
+    if not files:
+        print('No cavern mappings to check')
+        return 1
+    names = revision_names(files)
+    compare = ['compare/'+file for file in os.listdir('compare')] if args.compare else []
+    settings = {'nominal': args.nominal, 'compare': compare,
+                'check_lines': args.lines, 'sides': list(dict.fromkeys(args.side))}
+    apply_settings(settings)
+    cm.set_parse_funcs([cm.nominal, cm.schem_ip, cm.schem_mag] + compare)
+
+    # the inputs that are the same for all the revisions
+    print(f'\n\nParsing {cm.nominal}...\n\n')
+    nominal_lines = cm.side_nominal_lines(cm.parse_input(cm.nominal))
+    schem_table = cm.schem_lvr_load_table() if cm.check_lines else None
+
+    results = []
+    if not session.use_pool(len(files)): # a single revision: check it here
+        shared_inputs = (nominal_lines, schem_table)
+        results.append(check_revision(names[0], files[0]))
+        print(f'Checked {names[0]} (see fixme/{names[0]}/check_mappings.log)')
+    else:
+        with concurrent.futures.ProcessPoolExecutor(initializer=start_worker,
+                                                    initargs=(settings, (nominal_lines,
+                                                              schem_table))) as pool:
+            checks = [pool.submit(check_revision, name, file) for name, file in
+                      zip(names, files)]
+            for name, check in zip(names, checks):
+                results.append(check.result())
+                print(f'Checked {name} (see fixme/{name}/check_mappings.log)')
+
+    kinds = ['Unmatched Lines', 'Wrong PPP']
+    if compare: kinds.append('Petr Label Errors')
+    if cm.check_lines: kinds.append('LVR-Load Errors')
+    rows = summary_rows(names, files, results, kinds)
+    print('\n\nErrors per revision (cleanest first):\n')
+    print_table([row[:1] + row[2:] for row in rows])
+    with open(args.out, 'w') as f:
+        writer = csv.writer(f)
+        for row in rows: writer.writerow(row)
+    print(f'\nWrote {args.out}')
+
+if __name__ == '__main__':
+    main()
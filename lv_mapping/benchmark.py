@@ -0,0 +1,401 @@
+# Benchmark of the checks on synthetic mappings. The real nominal, cavern,
+# sense layout and netlist inputs in the repo are used as templates, and
+# replicated 1x/10x/100x in their own formats: each replica gets its own BPs
+# (eg. 'alpha' -> 'alphaxb'), LVR numbers (+100 per replica), Positronic
+# numbers (+100 per replica) and splitter labels, so the replicas are as
+# consistent with each other as the real inputs. Some typos (unknown flex) and
+# PPP errors (Positronic pins swapped between two lines) are injected into the
+# cavern mapping. Each stage of the checks is timed, and the timings are
+# written as JSON; if the JSON file already exists, the change vs the previous
+# timings is printed.
+#
+# python -m lv_mapping bench (-scales 1 10 100) (-o bench_results.json)
+
+import os, re, io, copy, json, time, math, random, shutil, platform, datetime
+import contextlib, warnings
+from argparse import ArgumentParser
+from . import xls_cache, session
+from . import check_mappings as cm
+from . import swap_planner
+
+nominal_template = 'nominal/surface_LV_power_tests_PMH_Formatting_wflex_flat_C_side.xlsx'
+cavern_template = 'formatted_cavern/LVR_PPP_Underground_Mapping_PPPSorted_Samtec_cables__03-01-23.xlsx'
+sense_template = 'formatted_cavern/underground_LVsense_layout_table.xlsx'
+swap_template = 'formatted_cavern/swap_positronic.xlsx'
+netlist_templates = ['nominal/PEPI_a_SIDE_g3.NET', 'nominal/PEPI_b_SIDE_g3.NET']
+tbb_template = 'nominal/TelemetryBB_Mirror_FINAL_mpeco.NET'
+typo_cavern = 'formatted_cavern/cavern_mapping_with_typos.xlsx'
+
+bp_token = re.compile(r'(^|_|-)(alpha|beta|gamma)(?=_|$)')
+lvr_id = re.compile(r'(\d+)( - J1)')
+ppp_num = re.compile(r'^P(\d+)')
+lvr_connector = re.compile(r'LVReg.*_\d+$')
+template_slave_pins = set(cm.slave_pins)
+template_mag_lvrs = set(cm.mag_lvrs)
+
+### renaming for replica r (replica 0 is the template itself)
+
+def suffix(r):
+    if r == 0: return ''
+    letters = ''
+    while True:
+        letters = chr(ord('a') + r % 26) + letters
+        r //= 26
+        if r == 0: return 'x' + letters
+
+def is_str(value): return isinstance(value, str)
+
+def is_num(value):
+    return isinstance(value, (int, float)) and not math.isnan(value)
+
+def rename_bp(value, r):
+    if not is_str(value): return value
+    return bp_token.sub(lambda m: m.group(1)+m.group(2)+suffix(r), value)
+
+def offset_lvr(value, r):
+    if is_num(value): return value + 100*r
+    if not is_str(value): return value
+    return lvr_id.sub(lambda m: str(int(m.group(1))+100*r)+m.group(2), value)
+
+def offset_port(value, r): # '34_J10'
+    if not is_str(value) or not '_J' in value: return value
+    lvr, con = value.split('_', 1)
+    return f'{int(lvr)+100*r}_{con}'
+
+def offset_ppp(value, r):
+    if not is_str(value): return value
+    return ppp_num.sub(lambda m: f'P{int(m.group(1))+100*r}', value)
+
+### writing the synthetic inputs
+
+def read_rows(file, sheet, **kwargs):
+    df = xls_cache.read_excel(file, sheet, **kwargs)
+    return list(df.columns), [[None if (isinstance(v, float) and math.isnan(v)) else v
+                               for v in row] for row in df.itertuples(index=False)]
+
+def write_sheet(workbook, name, header, rows, startrow=0, startcol=0, title=None):
+    worksheet = workbook.add_worksheet(name)
+    if title is not None: worksheet.write(startrow-1, startcol, title)
+    worksheet.write_row(startrow, startcol,
+                        [None if h.startswith('Unnamed') else h for h in header])
+    for i, row in enumerate(rows):
+        worksheet.write_row(startrow+1+i, startcol, row)
+
+def make_surface(file, scale):
+    import xlsxwriter
+    with xlsxwriter.Workbook(file, {'constant_memory': True}) as workbook:
+        for sheet in xls_cache.sheet_names(nominal_template):
+            header, rows = read_rows(nominal_template, sheet, usecols='A:G')
+            ppp_col = header.index('PPP Positronic')
+            for r in range(scale):
+                replica = [list(row) for row in rows]
+                for row in replica: row[ppp_col] = offset_ppp(row[ppp_col], r)
+                write_sheet(workbook, rename_bp(sheet, r), header, replica)
+
+# the cavern mapping is written twice: with the PPP errors only (for the checks
+# that only run on a typo-free mapping, like check_fix), and with the typos as
+# well (for the typo check); returns the number of (non-empty) lines, typos and
+# PPP errors
+def make_cavern(file, typo_file, scale, error_rate, rng):
+    lines = typos = ppp_errors = 0
+    sheets = {}
+    for sheet in cm.cavern_sheets(xls_cache.sheet_names(cavern_template)):
+        # the parsed columns are C:G, L and N:O, after 2 rows of titles
+        header, rows = read_rows(cavern_template, sheet, usecols='C:O',
+                                 skiprows=[0,1])
+        out = []
+        typo_rows = {}
+        for r in range(scale):
+            replica = []
+            for row in rows:
+                row = list(row)
+                row[0] = rename_bp(row[0], r)
+                row[2] = offset_ppp(row[2], r)
+                row[3] = offset_lvr(row[3], r)
+                row[4] = offset_lvr(row[4], r)
+                replica.append(row)
+            used = [row for row in replica if row[4] is not None]
+            lines += len(used)
+            for row in used:
+                if rng.random() >= error_rate: continue
+                if sheet.startswith('Hybrid') and rng.random() < 0.5:
+                    # typo: a flex that doesn't exist (eg. S2M -> Q2M)
+                    name = row[0].split('_')
+                    name[3] = 'Q' + name[3][1:]
+                    typo_rows[len(out)+replica.index(row)] = '_'.join(name)
+                    typos += 1
+                else:
+                    # PPP error: swap the Positronic pins of two lines
+                    other = rng.choice(used)
+                    row[2], other[2] = other[2], row[2]
+                    ppp_errors += 1
+            out += replica
+        sheets[sheet] = (header, out, typo_rows)
+    import xlsxwriter
+    for path, with_typos in [(file, False), (typo_file, True)]:
+        with xlsxwriter.Workbook(path, {'constant_memory': True}) as workbook:
+            for sheet, (header, out, typo_rows) in sheets.items():
+                if with_typos:
+                    out = [[typo_rows[i]]+row[1:] if i in typo_rows else row
+                           for i, row in enumerate(out)]
+                # 2 rows of titles, like the real sheets
+                write_sheet(workbook, sheet, header, out, startrow=2,
+                            startcol=2, title=sheet)
+    return lines, typos, ppp_errors
+
+def make_sense(file, scale):
+    import xlsxwriter
+    sheet = xls_cache.sheet_names(sense_template)[0]
+    header, rows = read_rows(sense_template, sheet, usecols='A:J')
+    port, spltr = header.index('LVR Port'), header.index('Splitter/Cable Label')
+    spltr_in = header.index('Splitter/Cable Input')
+    label = header.index('Sense Line Label')
+    out = []
+    for r in range(scale):
+        for row in rows:
+            row = list(row)
+            row[port] = offset_port(row[port], r)
+            if is_str(row[spltr]) and 'S' in row[spltr]:
+                if r: row[spltr] = f'{row[spltr]}.{r}'
+            else: row[spltr] = offset_port(row[spltr], r)
+            if r and is_str(row[spltr_in]) and '_' in row[spltr_in]:
+                lab, pair = row[spltr_in].rsplit('_', 1)
+                row[spltr_in] = f'{lab}.{r}_{pair}'
+            row[label] = rename_bp(row[label], r)
+            out.append(row)
+    with xlsxwriter.Workbook(file, {'constant_memory': True}) as workbook:
+        write_sheet(workbook, sheet, header, out)
+
+# PEPI netlists: each LVR connector (component named like J12_LVReg_X-Y_1.2_37)
+# is repeated for every replica, with its LVR number and the BPs of its nets
+# renamed
+def make_netlist(file, template, scale):
+    with open(template) as f: rows = f.readlines()
+    with open(file, 'w') as f:
+        block = None
+        for row in rows + ['']:
+            if block is not None and (row.startswith('  (') or row.startswith(' )')):
+                block.append(row)
+                continue
+            if block is not None: # end of an LVR connector
+                tokens = block[0].split()
+                name, lvr = tokens[3].rsplit('_', 1)
+                for r in range(scale):
+                    f.write(block[0].replace(tokens[3], f'{name}_{int(lvr)+100*r}'))
+                    for pin_row in block[1:]:
+                        pin = pin_row.split()
+                        if len(pin) >= 3 and pin_row.startswith('  ('):
+                            pin_row = pin_row.replace(pin[2], rename_bp(pin[2], r))
+                        f.write(pin_row)
+                block = None
+            tokens = row.split()
+            if row.startswith(' ( ') and len(tokens) >= 4 and \
+               lvr_connector.search(tokens[3]):
+                block = [row]
+            else: f.write(row)
+
+def make_inputs(dir, scale, error_rate, seed):
+    for sub in ['nominal', 'formatted_cavern', 'fixme', 'output', 'compare']:
+        os.makedirs(os.path.join(dir, sub), exist_ok=True)
+    rng = random.Random(seed)
+    make_surface(os.path.join(dir, nominal_template), scale)
+    counts = make_cavern(os.path.join(dir, cavern_template),
+                         os.path.join(dir, typo_cavern), scale, error_rate, rng)
+    make_sense(os.path.join(dir, sense_template), scale)
+    for template in netlist_templates:
+        make_netlist(os.path.join(dir, template), template, scale)
+    # only the template Positronics are swapped, and the tBB isn't replicated
+    # (all replicas are sensed through the same tBB connectors)
+    shutil.copy(swap_template, os.path.join(dir, swap_template))
+    shutil.copy(tbb_template, os.path.join(dir, tbb_template))
+    return counts
+
+### timing the stages
+
+class stopwatch:
+    def __init__(self):
+        self.timings = {}
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()): # the checks are chatty
+            yield
+        self.timings[name] = self.timings.get(name, 0) + time.perf_counter() - start
+
+# the check_mappings settings (module globals) that the stages change: the
+# replicas' slave pins and mag LVRs, and what the end-to-end runs set from
+# their arguments. they're put back after each scale, so that the next scale
+# (or whoever called main) runs with the repo's own
+cm_settings = ['slave_pins', 'mag_lvrs', 'nominal', 'cavern', 'compare',
+               'check_lines', 'cavern_sense', 'swap_pos', 'incremental',
+               'fixme_xlsx', 'sides', 'side', 'parse_func', 'corrected',
+               'store', 'sheet_entries']
+
+@contextlib.contextmanager
+def saved_settings():
+    saved = {name: copy.copy(getattr(cm, name)) for name in cm_settings}
+    try: yield
+    finally:
+        for name, value in saved.items(): setattr(cm, name, value)
+
+# drop everything that was parsed in this process, and the on-disk cache
+def forget_parsed(clear_disk):
+    session.clear()
+    xls_cache.workbooks.clear()
+    xls_cache.file_hashes.clear()
+    if clear_disk: shutil.rmtree(xls_cache.cache_dir, ignore_errors=True)
+
+def parse_all(watch, prefix):
+    with watch.stage(f'{prefix}nominal'):
+        nominal_lines = cm.parse_surface(nominal_template)
+    with watch.stage(f'{prefix}cavern'):
+        cavern_lines = cm.parse_cavern(cavern_template)
+        typo_lines = cm.parse_cavern(typo_cavern)
+    with watch.stage(f'{prefix}netlists'):
+        ip_map_lvr_load, mag_map_lvr_load = [cm.parse_netlist(netlist) for
+                                             netlist in netlist_templates]
+        map_lvr_load = {**ip_map_lvr_load, **mag_map_lvr_load}
+        schem_table = cm.lvr_load_table(ip_map_lvr_load, mag_map_lvr_load)
+        tbb_map = cm.parse_tbb(tbb_template)
+    with watch.stage(f'{prefix}sense'):
+        senselines = cm.parse_cavern_sense(sense_template, map_lvr_load)
+    return nominal_lines, cavern_lines, typo_lines, schem_table, senselines
+
+# the state the matching leaves the nominal lines in (LVR info, lengths, labels)
+def nominal_state(nominal_lines):
+    return [(l.full_key(), l.ppp_label, l.lvr_label) for l in nominal_lines]
+
+# the match of the incremental mode (see check_mappings.incremental_match), on
+# its own copy of the nominal lines; returns how many of them it leaves in
+# another state than the full match did (full_state), plus how many of the
+# matched nominal lines it returns aren't the ones it was given
+def incremental_mismatches(nominal_lines, full_state, sides):
+    nominal_index = cm.index_lines(nominal_lines, cm.line.key_minus_ppp)
+    cm.store = cm.sheet_entries = None # read the run store back from disk
+    given = {id(l) for l in nominal_lines}
+    mismatches = 0
+    for cm.side in sides:
+        pairs, pairs_flip, matched, messages = cm.incremental_match(nominal_index)
+        mismatches += sum(1 for nl in matched if not id(nl) in given)
+    return mismatches + sum(1 for a, b in zip(full_state, nominal_state(nominal_lines))
+                            if a != b)
+
+def run_stages(scale):
+    with saved_settings(): return time_stages(scale)
+
+def time_stages(scale):
+    watch = stopwatch()
+    # the replicas' slave lines and mag LVRs (see check_mappings.senseline_used
+    # and organize_cctb_sense_table)
+    cm.slave_pins = template_slave_pins | {offset_port(pin, r) for pin in
+                                           template_slave_pins for r in range(1, scale)}
+    cm.mag_lvrs = template_mag_lvrs | {lvr+100*r for lvr in template_mag_lvrs
+                                       for r in range(1, scale)}
+    forget_parsed(True)
+    nominal_lines, cavern_lines, typo_lines, schem_table, senselines = \
+        parse_all(watch, 'parse (cold) ')
+    forget_parsed(False)
+    parse_all(watch, 'parse (cached) ')
+
+    found = {}
+    with watch.stage('typo check'):
+        found['typos'] = len(cm.typo_keys(nominal_lines, typo_lines))
+    unmatched = [copy.deepcopy(nominal_lines) for run in ['cold', 'warm']]
+    with watch.stage('check_fix (match)'):
+        nominal_index = cm.index_lines(nominal_lines, cm.line.key_minus_ppp)
+        pairs, pairs_flip, matched, messages = \
+            cm.match_nominal_lines(cavern_lines, nominal_index)
+    found['wrong PPP'] = sum(1 for cl, nl in pairs if not cl==nl)
+    # the incremental mode should leave the nominal lines as the full match
+    # does, both when it makes the per-sheet results and when it re-uses them
+    cm.nominal, cm.cavern, cm.incremental = nominal_template, cavern_template, True
+    cm.sides = sorted({l.x for l in cavern_lines})
+    full_state = nominal_state(nominal_lines)
+    found['incremental mismatches'] = 0
+    for run, lines in zip(['cold', 'warm'], unmatched):
+        with watch.stage(f'check_fix (incremental, {run})'):
+            found['incremental mismatches'] += \
+                incremental_mismatches(lines, full_state, cm.sides)
+    cm.incremental = False
+    with watch.stage('swap'):
+        moved, problems = cm.parse_swap_pos(swap_template, cavern_lines)
+        nominal_ppp_index = cm.index_lines(dict.fromkeys(matched), cm.line.key_pepi_ppp)
+        for ml in moved: nominal_ppp_index.get(ml.key_pepi_ppp(), [])
+    with watch.stage('swap planning'):
+        swap_planner.plan_swaps(pairs, nominal_lines,
+                                sorted({(l.x, l.y, l.z) for l in nominal_lines}))
+    with watch.stage('LVR-load check'):
+        cm.lvr_load_errors(cavern_lines, schem_table)
+    with watch.stage('sense check'):
+        power_index = cm.index_power_lines_sense(cavern_lines)
+        for truemir in ['True', 'Mirror']:
+            cm.organize_cctb_sense_table(senselines, truemir, power_index, [])
+    with watch.stage('CCTB emission'):
+        corrected = {cl.full_key(): nl for cl, nl in pairs if nl.ppp != 'na'}
+        pepi_lines = cm.partition_lines_pepi(list(corrected.values()))
+        cm.write_csvs({f'output/{y}_{z}_bench_cctb.csv': cm.organize_cctb_table(lines)
+                       for (y, z), lines in pepi_lines.items()})
+    # and the whole commands, as run by the users (with the cache warm); the
+    # swap isn't part of it, as moving Positronics that have PPP errors on them
+    # doesn't give a consistent mapping
+    with watch.stage('check_mappings (end-to-end)'):
+        cm.main([nominal_template, cavern_template, 'false', 'true'])
+    with watch.stage('check_mappings C+A (end-to-end)'):
+        cm.main([nominal_template, cavern_template, 'false', 'true', '-side', 'C', 'A'])
+    with watch.stage('check_mappings -c (end-to-end)'):
+        cm.main([nominal_template, cavern_template, 'false', 'false', '-c', sense_template])
+    counts = {'nominal lines': len(nominal_lines), 'cavern lines': len(cavern_lines),
+              'sense lines': len(senselines), 'found': found}
+    return watch.timings, counts
+
+def main(argv=None):
+    parser = ArgumentParser(description='Time the checks on synthetic mappings')
+    parser.add_argument('-scales', nargs='+', type=int, default=[1, 10, 100],
+                        help='specify the replication factors of the inputs')
+    parser.add_argument('-errors', type=float, default=0.005,
+                        help='specify the fraction of cavern lines with a typo/PPP error')
+    parser.add_argument('-seed', type=int, default=1, help='specify the random seed')
+    parser.add_argument('-dir', default='bench', help='specify where to make the inputs')
+    parser.add_argument('-out', '-o', default='bench_results.json',
+                        help='specify the JSON file for the timings')
+    args = parser.parse_args(argv)
+    warnings.simplefilter(action='ignore', category=FutureWarning)
+
+    previous = {}
+    if os.path.isfile(args.out):
+        with open(args.out) as f: previous = json.load(f).get('scales', {})
+    results = {'date': datetime.datetime.now().isoformat(timespec='seconds'),
+               'python': platform.python_version(), 'cpus': os.cpu_count(),
+               'scales': {}}
+    # the synthetic inputs are made (and checked) in their own directory
+    repo = os.getcwd()
+    out = os.path.abspath(args.out)
+    for scale in args.scales:
+        dir = os.path.abspath(os.path.join(args.dir, f'x{scale}'))
+        shutil.rmtree(dir, ignore_errors=True)
+        print(f'\nMaking {scale}x inputs in {dir}...')
+        start = time.perf_counter()
+        lines, typos, ppp_errors = make_inputs(dir, scale, args.errors, args.seed)
+        made = time.perf_counter() - start
+        os.chdir(dir)
+        try: timings, counts = run_stages(scale)
+        finally: os.chdir(repo)
+        results['scales'][str(scale)] = {**counts, 'typos': typos,
+            'ppp errors': ppp_errors, 'make inputs': made, 'stages': timings}
+        print(f'{counts["nominal lines"]} nominal, {counts["cavern lines"]} cavern, '+
+              f'{counts["sense lines"]} sense lines ({typos} typos, {ppp_errors} '+
+              f'PPP errors injected; {counts["found"]["typos"]} typos, '+
+              f'{counts["found"]["wrong PPP"]} wrong PPPs found; '+
+              f'{counts["found"]["incremental mismatches"]} nominal lines left '+
+              f'differently by the incremental match)')
+        old = previous.get(str(scale), {}).get('stages', {})
+        for stage, seconds in timings.items():
+            change = ''
+            if old.get(stage): change = f'  ({seconds/old[stage]:.2f}x previous)'
+            print(f'  {stage:32} {seconds:8.3f} s{change}')
+    with open(out, 'w') as f: json.dump(results, f, indent=2)
+    print(f'\nWrote {args.out}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+"""
+Parse the DCB and hybrid sheets of the (formatted) cavern mapping; shared by
+parse_xls (Mark's software-readable mappings) and check_mappings
+"""
+import os, fnmatch
+import concurrent.futures
+from . import xls_cache # cached reading of the workbook sheets
+from . import session # parsed once per process, whichever script asks first
+
+#
+# Each sheet is read whole, as cells, so that the table of lines (sheetTable)
+# and the titles over the length columns (sheetTitles) come from the same read
+#
+def readSheets( file, sheets ):
+    return xls_cache.read_sheets( file, sheets, header=None, dtype=object )
+
+def cavernSheets( file ):
+    sheets = xls_cache.sheet_names( file )
+    return fnmatch.filter( sheets, "DCB - *" ) + fnmatch.filter( sheets, "Hybrid - *" )
+
+# all the DCB and hybrid sheets, read in one go (so the workbook is decoded
+# once, on a cache miss), once per process
+def readWorkbook( file ):
+    return session.parse( file, readCavernSheets )
+
+def readCavernSheets( file ):
+    return readSheets( file, cavernSheets( file ) )
+
+# the table of a sheet read whole, as read_excel( usecols="C:G,L,N:O",
+# skiprows=[0,1] ) reads it (the empty cells are '' to the parser, like when
+# reading the workbook)
+def sheetTable( cells ):
+    from pandas.io.parsers import TextParser
+    rows = cells.fillna('').values.tolist()[2:]
+    return TextParser( rows, header=0, usecols=[2,3,4,5,6,11,13,14] ).read()
+
+# the row of titles over the length columns (N:O) of a sheet read whole
+def sheetTitles( cells ):
+    return cells.iloc[1:2, 13:15]
+
+#
+# This part is common to the hybrids and DCBs
+#
+def parseSheet( cells ):
+    dfIn = sheetTable( cells )
+    cols = list(dfIn.columns)
+    cols[-4] = 'LVR'
+    dfIn.columns = cols
+    # get rid of empty rows
+    dfIn = dfIn.dropna(subset=['LVR'])
+    # make separate columns with LVR ID plus connector, pin & channel for LVR and PPP connectors
+    dfIn['LVR ID - Connector - Pin'] = dfIn['LVR ID - Connector - Pin'].str.replace(' ', '').str.replace( '2.5V:','')
+    dfIn[['LVR ID','LVR Connector', 'LVR Pin']] = dfIn['LVR ID - Connector - Pin'].str.split('-', expand=True)
+    dfIn['LVR ID - Connector - Pin'] = dfIn['LVR ID - Connector - Pin'].str.replace('-',' - ')
+    dfIn['LVR Channel'] = (dfIn['LVR Connector'].str.replace('J','').astype(int) - 12)*4 + ( 8 - dfIn['LVR Pin'].str[0:1].astype(int) ) / 2 +1
+    dfIn[['PPP Positronic', 'PPP Src/Ret']] = dfIn['PPP Connector - Pin'].str.replace(' ','').str.split('-', expand=True)
+    return dfIn
+
+#
+# Read sheet for DCBs and add additional information to data frame
+#
+def parseDCBs( cells ):
+    dfIn = parseSheet( cells )
+    # set voltage
+    dfIn['Voltage'] = '1V5'
+    dfIn.loc[ dfIn['PPP Name'].str.contains( '2V5' ), 'Voltage' ] = "2V5"
+    dfIn['M/S/A'] = 'A'
+    dfIn.loc[ dfIn['PPP Name'].str.contains( 'Master' ), 'M/S/A' ] = "M"
+    dfIn.loc[ dfIn['PPP Name'].str.contains( 'Slave' ), 'M/S/A' ] = "S"
+
+    # set DCB and position
+    ###dfIn['LVR Name'] = dfIn['LVR Name'].str.replace( 'alhpa', 'alpha' )
+    aa = dfIn['LVR Name'].str.split('_', expand=True)
+    aa.loc[ aa[6].isnull(), 'DCB' ] = aa[1]
+    aa.loc[ ~aa[6].isnull(), 'DCB' ] = aa[2] + '&' + aa[1]
+
+    aa['Pos'] = aa[1].astype(float)
+    aa.loc[ aa['DCB'].str.contains('&'), 'Pos' ] += 1.5
+    dfIn[['DCB','Pos']] = aa[['DCB','Pos']]
+    dfIn = dfIn.sort_values( by=['Pos', 'PPP Name' ] )
+    dfIn['BP Connector'] = 'JD' + dfIn['DCB'].str.replace('&','-')
+    dfIn['iBB/P2B2 Connector'] = dfIn['PPP Name'].apply( lambda x: x[x.find( 'J', 1 ):x.find( '_', x.find( 'J', 1 ) )] )
+    dfIn['SBC FLEX NAME'] = 'n/a'
+
+    # delete columns with repeated/unnecessary information
+    del dfIn['Pos']
+    #del dfIn['LVR']
+    return dfIn
+
+
+#
+# Read sheet for hybrids and add additional information to data frame
+#
+def parseHybrids( cells ):
+    dfIn = parseSheet( cells )
+    # get flex and 4-asic group
+    aa = dfIn['LVR Name'].str.split("_",expand=True)
+    dfIn['SBC FLEX NAME'] = aa[3]
+    dfIn['4-asic group'] = aa[4]
+
+    # set type - M/S for the 8-asic hybrids in alpha, otherwise A
+    dfIn['M/S/A'] = 'A'
+    # alpha, X0S and S0S
+    dfIn.loc[ dfIn['LVR Name'].str.contains( 'alpha' ) & dfIn['LVR Name'].str.contains( '0S_P1W' ), 'M/S/A' ] = "M"
+    dfIn.loc[ dfIn['LVR Name'].str.contains( 'alpha' ) & dfIn['LVR Name'].str.contains( '0S_P1E' ), 'M/S/A' ] = "S"
+    dfIn.loc[ dfIn['LVR Name'].str.contains( 'alpha' ) & dfIn['LVR Name'].str.contains( '0S_P2E' ), 'M/S/A' ] = "M"
+    dfIn.loc[ dfIn['LVR Name'].str.contains( 'alpha' ) & dfIn['LVR Name'].str.contains( '0S_P2W' ), 'M/S/A' ] = "S"
+    # alpha X0M and SOM
+    dfIn.loc[ dfIn['LVR Name'].str.contains( 'alpha' ) & dfIn['LVR Name'].str.contains( '0M_P1W' ), 'M/S/A' ] = "M"
+    dfIn.loc[ dfIn['LVR Name'].str.contains( 'alpha' ) & dfIn['LVR Name'].str.contains( '0M_P1E' ), 'M/S/A' ] = "S"
+    # alpha X1S and S1S
+    dfIn.loc[ dfIn['LVR Name'].str.contains( 'alpha' ) & dfIn['LVR Name'].str.contains( '1S_P1W' ), 'M/S/A' ] = "M"
+    dfIn.loc[ dfIn['LVR Name'].str.contains( 'alpha' ) & dfIn['LVR Name'].str.contains( '1S_P1E' ), 'M/S/A' ] = "S"
+    # alpha X1M and S1M
+    dfIn.loc[ dfIn['LVR Name'].str.contains( 'alpha' ) & dfIn['LVR Name'].str.contains( '1M_P1W' ), 'M/S/A' ] = "M"
+    dfIn.loc[ dfIn['LVR Name'].str.contains( 'alpha' ) & dfIn['LVR Name'].str.contains( '1M_P1E' ), 'M/S/A' ] = "S"
+
+    # Sort by backplane connection
+    dfIn[ ['BP Connector', 'iBB/P2B2 Connector' ] ] = dfIn['PPP Name'].str.split('_', expand=True)[ [0, 1] ]
+    dfIn['Pos'] = dfIn['BP Connector'].str.replace( 'JP', '' ).astype(int)
+    dfIn = dfIn.sort_values( by=['Pos', '4-asic group' ] )#, 'LVR Name'] )
+
+    # delete columns with duplicate/unnecessary information
+    # (the LVR, LVR ID and PPP connector columns are still used by check_mappings;
+    # parse_xls only picks the columns it writes)
+    del dfIn['Pos']
+    return dfIn
+
+#
+# Parse the DCB and hybrid sheets: the sheets are read once (readWorkbook), and
+# only the parsing of the read cells is shared out to a pool of worker
+# processes (one sheet per task), when there are enough sheets for that to be
+# faster than parsing them one after the other (and this process isn't a pool
+# worker already, see session.use_pool); the results are collected in
+# sheet order, so the merged output doesn't depend on which worker finishes
+# first. Returns the maps from sheet name to data frame for the DCBs and the
+# hybrids; don't modify them, they're shared
+#
+pool_sheets = 32
+
+def parseWorkbook( file ):
+    return session.parse( file, parseSheets )
+
+def parseSheets( file ):
+    cells = readWorkbook( file )
+    parsers = [ ( sheet, parseDCBs if sheet.startswith( 'DCB' ) else parseHybrids )
+                for sheet in cells ]
+    if len( parsers ) < pool_sheets or ( os.cpu_count() or 1 ) < 2 or \
+       not session.use_pool( len( parsers ) ):
+        dfs = { sheet: parse( cells[sheet] ) for sheet, parse in parsers }
+    else:
+        with concurrent.futures.ProcessPoolExecutor() as pool:
+            futs = [ pool.submit( parse, cells[sheet] ) for sheet, parse in parsers ]
+            dfs = { sheet: fut.result() for ( sheet, parse ), fut in zip( parsers, futs ) }
+    dfDCBs = { sheet: df for sheet, df in dfs.items() if sheet.startswith( 'DCB' ) }
+    dfHybrids = { sheet: df for sheet, df in dfs.items() if not sheet.startswith( 'DCB' ) }
+    return ( dfDCBs, dfHybrids )
@@ -0,0 +1,2100 @@
+# Check the cavern mapping for typos (that can't be easily handled), then (once
+# user fixes typos) check the surface mapping vs the cavern mapping (and also
+# against any other references, eg. the sheet used to test the produced PEPI
+# cables) PPP info. Output cavern differences to files in fixme folder,
+# including directions for shifters fixing the cables by moving labels.
+# Note: this script can also check the LV cavern LVR-load mapping is correct vs
+# Phoebe's schematics.
+# Note: the script also now checks that Petr's LV labels were generated
+# correctly. Here, the PPP color info isn't checked.
+# Note: script also outputs a table for the underground power.
+
+import os, sys, re, io, fnmatch, math, csv, mmap, collections, contextlib
+import concurrent.futures
+from argparse import ArgumentParser
+from . import xls_cache # cached reading of the workbook sheets
+from . import run_store # per-sheet results, for the incremental mode
+from . import session # each input parsed once per run
+from .profiling import prof # stage timers/counters for -profile
+from .cavern_xls import parseWorkbook, parseDCBs, parseHybrids # shared with parse_xls
+from .cavern_xls import readWorkbook, readSheets, sheetTitles
+
+# problem seems to be restricted to hybrid mag mirror (stereo+straight)
+only_hyb_mag_mir = False
+
+# see if flipping stereo<->straight helps
+check_stereo_straight_flip = False
+
+# files being checked; set from the command line args by main()
+nominal = 'NA'
+cavern = 'NA'
+compare = []
+check_lines = False
+schem_ip = 'nominal/PEPI_a_SIDE_g3.NET'
+schem_mag = 'nominal/PEPI_b_SIDE_g3.NET'
+tbb_schem = 'nominal/TelemetryBB_Mirror_FINAL_mpeco.NET'
+cavern_sense = 'NA'
+swap_pos = 'NA'
+incremental = False
+# also write the xlsx versions of the fixme reports (one sheet per PEPI)
+fixme_xlsx = False
+# sides to check (see the -side option), and the side being checked
+sides = ['C']
+side = 'C'
+# where the reports go; the batch mode (see batch.py) gives each revision of
+# the cavern mapping its own. the _alex.txt files go next to Petr's files
+# unless alex_dir is set
+fixme_dir = 'fixme'
+output_dir = 'output'
+alex_dir = None
+
+# basic class that will uniquely identify (with redundancy) power lines, along
+# with PPP connector and pin; LVR/length info not available in all sheets, so
+# don't set those variables on construction
+# the identifying info is stored (interned) in one tuple that can't be changed
+# after construction, with its hash computed once, since lines are used a lot
+# as dict keys; the LVR/length/label info isn't part of the identity
+class line:
+
+    __slots__ = ('_id', '_hash', 'length_c', 'length_a', 'lvr', 'lvr_ch',
+                 'ppp_label', 'lvr_label', 'lvr_loads')
+
+    def __init__(self, x, y, z, bp, bp_con, ibbp2b2, flex, load, msa, ppp,
+                 ppp_pin):
+        # z is z of load being powered, not of LVR in SBC
+        self._id = tuple(intern_str(info) for info in
+                         (x, y, z, bp, bp_con, ibbp2b2, flex, load, msa, ppp,
+                          ppp_pin))
+        self._hash = hash(self._id)
+        self.length_c = '-1' # set this explicitly later
+        self.length_a = '-1' # set this explicitly later
+        self.lvr = '-1' # set this explicitly later
+        self.lvr_ch = '-1' # set this explicitly later
+        self.ppp_label = 'NA' # Petr's PPP label for cavern; redundant info
+        self.lvr_label = 'NA' # Petr's LVR label for cavern; redundant info
+        # (LVR + src pin, load) of each LVR ch, like the netlist keys (see
+        # parse_netlist); taken from the LVR label columns when parsed
+        self.lvr_loads = ()
+
+    x = property(lambda self: self._id[0])
+    y = property(lambda self: self._id[1])
+    z = property(lambda self: self._id[2])
+    bp = property(lambda self: self._id[3])
+    bp_con = property(lambda self: self._id[4])
+    ibbp2b2 = property(lambda self: self._id[5])
+    flex = property(lambda self: self._id[6])
+    load = property(lambda self: self._id[7])
+    msa = property(lambda self: self._id[8])
+    ppp = property(lambda self: self._id[9])
+    ppp_pin = property(lambda self: self._id[10])
+
+    def equal_minus_ppp(self, other):
+        return self._id[:9] == other._id[:9]
+
+    def equal_pepi_ppp(self, other):
+        return self.key_pepi_ppp() == other.key_pepi_ppp()
+
+    # hashable keys for matching lines through an index (see index_lines);
+    # two lines have equal keys exactly when equal_minus_ppp/equal_pepi_ppp
+    def key_minus_ppp(self):
+        return self._id[:9]
+
+    def key_pepi_ppp(self):
+        return self._id[:3] + self._id[9:]
+
+    # key for identity (==, hash) vs key including the LVR and lengths, for
+    # when lines with the same identity but different LVR must be kept apart
+    def identity_key(self):
+        return self._id
+
+    def full_key(self):
+        return self._id + (self.lvr, self.lvr_ch, self.length_c, self.length_a)
+
+    # returns if this power line corresponds to the given senseline; compares if
+    # z is equal, if True/Mirror (based on x/y) is equal, and if the same LVR+ch
+    # note that senselines don't store x/y/z info, so this needs to input manually!
+    def corresponds_sense(self, sl, sl_truemir, sl_z):
+        truemir_pow = true_mirror(self.x, self.y, self.z)
+        # recall that you combine Y splices here, but you don't for the sense! (for now)
+        # also, some lvr channels still carry around the '.0'...
+        chs = self.lvr_ch.split(' Y ')
+        for i in range(len(chs)): chs[i] = str(int(float(chs[i])))
+        return (truemir_pow==sl_truemir and self.z==sl_z and self.lvr==sl.lvr and
+                lvr_twistpair_to_ch(sl.lvr_con, sl.lvr_twistpair) in chs)
+
+    def set_length(self, length_c, length_a):
+        self.length_c = str(length_c)
+        if (not self.length_c == 'splice') and (not '|' in self.length_c):
+            # not sure what python is doing with floats here...
+            self.length_c = one_dec_str(self.length_c)
+        self.length_a = str(length_a)
+        if (not self.length_a == 'splice') and (not '|' in self.length_a):
+            self.length_a = one_dec_str(self.length_a)
+
+    def set_lvr(self, lvr, lvr_ch):
+        self.lvr = str(lvr)
+        self.lvr_ch = str(lvr_ch)
+
+    def set_labels(self, ppp_label, lvr_label):
+        self.ppp_label = ppp_label
+        self.lvr_label = lvr_label
+
+    def get_lvr_pins(self):
+        chs = self.lvr_ch.split(' Y ')
+        res = ''
+        for chn in chs:
+            ch = int(float(chn))
+            con = 'n/a'
+            pins = 'n/a'
+            if ch<5:
+                con = 'J12'
+                pin = 10-2*ch
+                pins = f'{pin}/{pin-1}'
+            else:
+                con = 'J13'
+                pin = 18-2*ch
+                pins = f'{pin}/{pin-1}'
+            res += f'{self.lvr} - {con} - {pins}  Y  '
+        res = res[:-5] # get rid of final '  Y  '
+        return res
+
+    def flip_stereo_straight_line(self):
+        # leave all other info the same, just change flex and BP con
+        if "JD" in self.bp_con: return self # leave DCBs alone
+        mirror=False
+        if self.x=='C' and ((self.y=='bot' and self.z=='mag') or
+                            (self.y=='top' and self.z=='ip')):
+            mirror = True
+        if self.x=='A' and ((self.y=='bot' and self.z=='ip') or
+                            (self.y=='top' and self.z=='mag')):
+            mirror = True
+        new_flex = self.flex
+        if new_flex[0]=='X': new_flex = 'S'+new_flex[1:]
+        else: new_flex = 'X'+new_flex[1:]
+        new_bp_con = bp_con_alt_to_JP(new_flex, mirror)
+        new_line = line(self.x, self.y, self.z, self.bp, new_bp_con,
+                        self.ibbp2b2, new_flex, self.load, self.msa,
+                        self.ppp, self.ppp_pin)
+        new_line.set_length(self.length_c, self.length_a)
+        new_line.set_lvr(self.lvr, self.lvr_ch)
+        new_line.lvr_loads = self.lvr_loads
+        return new_line
+
+    def __eq__(self, other):
+        return self._hash == other._hash and self._id == other._id
+
+    # the hash of a str differs between processes, so don't pickle the hash
+    def __getstate__(self):
+        return {slot: getattr(self, slot) for slot in line.__slots__
+                if slot != '_hash'}
+
+    def __setstate__(self, state):
+        for slot in state: setattr(self, slot, state[slot])
+        self._hash = hash(self._id)
+
+    def __hash__(self):
+        return self._hash
+
+
+# basic class that will uniquely identify (with redundancy) sense lines
+# will have one senseline object for 4 actual sense lines: one in each SB; the
+# only true/mir difference is the PPP connector and load served (ie. what the
+# mirror vs true tBB maps to in the JP notation)
+class senseline:
+
+    def __init__(self, crate, slot, lvr, lvr_con, lvr_twistpair, spltr,
+                 out_spltr, in_spltr, in_twistpair, in_label, ppp_true,
+                 ppp_mir, tbb_con):
+        self.crate = crate
+        self.slot = slot
+        self.lvr = lvr
+        self.lvr_con = lvr_con # J10 or J16
+        self.lvr_twistpair = lvr_twistpair # 1-2, 4-5, 3-6, or 7-8
+        self.spltr = spltr # the full splitter label
+        self.out_spltr = out_spltr
+        self.in_spltr = in_spltr
+        self.in_twistpair = in_twistpair
+        self.in_label = in_label # contains bp info
+        self.ppp_true = ppp_true
+        self.ppp_mir = ppp_mir
+        self.tbb_con = tbb_con
+
+    def in_spltr_lab(self):
+        spltr_type=get_spltr_type(self.spltr)
+        if spltr_type=='direct': return '-'
+        elif spltr_type in ['1', '4']: return self.spltr
+        elif spltr_type in ['2', '3', '6']: return f'{self.spltr}_{self.in_spltr}'
+        else: print('what?')
+
+    def out_spltr_lab(self):
+        spltr_type=get_spltr_type(self.spltr)
+        if spltr_type=='direct': return spltr_type
+        elif spltr_type in ['1', '2', '3', '4', '6']:
+            return f'Type {spltr_type} - OUT {self.out_spltr}'
+        else: print('huh?')
+
+    def get_bp(self):
+        return self.in_label.split('_')[0]
+
+    # from tBB schematic! For DCBs I have flex = 1V5 or 2V5
+    def get_flex(self, tbb_map):
+        tbb_twistpair = f'{self.tbb_con}_{self.in_twistpair}'
+        if not tbb_twistpair in tbb_map:
+            print(f'couldnt find {tbb_twistpair}!')
+            return 'n/a'
+        return (tbb_map[tbb_twistpair].split('_'))[0]
+
+    def get_load(self, tbb_map):
+        tbb_twistpair = f'{self.tbb_con}_{self.in_twistpair}'
+        if not tbb_twistpair in tbb_map:
+            print(f'couldnt find {tbb_twistpair}!')
+            return 'n/a'
+        return (tbb_map[tbb_twistpair].split('_'))[1]
+
+    def get_msa(self, lines): return
+
+
+####### Helpers
+
+# strings repeat a lot between lines (x/y/z, BP, flex, ...), so only keep one
+# copy of each
+def intern_str(info):
+    if type(info) is str: return sys.intern(info)
+    return info
+
+def one_dec_str(float_str):
+    return str(round(float(float_str), 1))
+
+# map from key (eg. line.key_minus_ppp) to the list of lines with that key, in
+# the original order; lets matching be a lookup instead of a loop over lines
+def index_lines(lines, key):
+    index = {}
+    for l in lines: index.setdefault(key(l), []).append(l)
+    return index
+
+# stealing my old code from generating the surface mappings
+def bp_con_JP_to_alt(JP, mirror): # converts JP # to alt BP connector notation
+  index=int(JP[2:])
+  if mirror:
+    if (index//2)%2==0: index+=2
+    else: index-=2
+  alt_labels = ["X0M","X0S","S0S","S0M","X1M","X1S","S1S","S1M","X2M","X2S",
+                "S2S","S2M"]
+  return alt_labels[index]
+
+def bp_con_alt_to_JP(alt, mirror): # converts alt BP connector notation to JP #
+  # take advantage of mapping being 1-to-1
+  for JP in range(12):
+    if bp_con_JP_to_alt("JP"+str(JP), mirror)==alt: return "JP"+str(JP)
+  return None # should never return here
+
+# returns channel that sense line is associated w/ on LVR
+def lvr_twistpair_to_ch(sense_con, twistpair):
+    if sense_con=='J10':
+        if twistpair=='1-2': return '1'
+        elif twistpair=='4-5': return '2'
+        elif twistpair=='3-6': return '3'
+        elif twistpair=='7-8': return '4'
+        else: return '???'
+    elif sense_con=='J16':
+        if twistpair=='1-2': return '5'
+        elif twistpair=='4-5': return '6'
+        elif twistpair=='3-6': return '7'
+        elif twistpair=='7-8': return '8'
+        else: return '????'
+    else:
+        return '?????'
+
+def get_spltr_type(spltr_lab):
+    if not 'S' in spltr_lab: return 'direct'
+    else: return spltr_lab[1] # all splitter types are 1 digit
+
+# return pin in 'J12_4' etc format (only src pin)
+def lvr_ch_to_pin(chn):
+    ch = int(float(chn))
+    con = 'n/a'
+    pin = 'n/a'
+    if ch<5:
+        con = 'J12'
+        pin = f'{10-2*ch}'
+    else:
+        con = 'J13'
+        pin = f'{18-2*ch}'
+    return f'{con}_{pin}'
+
+# define the connections in the splitter boards; return 'n/a' if out twisted pair
+# maps nowhere, else return the in [port, twisted pair] that it maps to
+def spltr1(out_port, out_twistpair):
+    if out_port=='a':
+        if out_twistpair=='1-2': return ['-', '1-2']
+        if out_twistpair=='3-6': return ['-', '3-6']
+    elif out_port=='b':
+        if out_twistpair=='1-2': return ['-', '4-5']
+        if out_twistpair=='3-6': return ['-', '7-8']
+    else:
+        return False # ugly to mix types, but fine
+
+def spltr2(out_port, out_twistpair):
+    if out_port=='a':
+        if out_twistpair=='1-2': return ['1', '1-2']
+        if out_twistpair=='4-5': return ['1', '4-5']
+        if out_twistpair=='3-6': return ['2', '3-6']
+        if out_twistpair=='7-8': return ['1', '7-8']
+    elif out_port=='b':
+        if out_twistpair=='1-2': return ['3', '1-2']
+        if out_twistpair=='4-5': return ['3', '4-5']
+        if out_twistpair=='3-6': return ['2', '7-8']
+        if out_twistpair=='7-8': return ['3', '7-8']
+    else:
+        return False
+
+def spltr3(out_port, out_twistpair):
+    if out_port=='a':
+        if out_twistpair=='1-2': return ['1', '1-2']
+        if out_twistpair=='4-5': return ['2', '1-2']
+        if out_twistpair=='3-6': return ['1', '3-6']
+    elif out_port=='b':
+        if out_twistpair=='1-2': return ['1', '4-5']
+        if out_twistpair=='4-5': return ['2', '4-5']
+        if out_twistpair=='3-6': return ['1', '7-8']
+        if out_twistpair=='7-8': return ['2', '7-8']
+    else:
+        return False
+
+# identical to type 1 board... but make sure input isn't ['1', '7-8']!
+def spltr4(out_port, out_twistpair):
+    ret = spltr1(out_port, out_twistpair)
+    if (not ret==False) and ret[1]=='7-8':
+        print(f'Found a supposed type 4 splitter w 7-8 input used!')
+        return False
+    return ret
+
+# type 5 splitter no longer in use!
+
+def spltr6(out_port, out_twistpair):
+    if out_port=='a':
+        if out_twistpair=='1-2': return ['1', '4-5']
+        if out_twistpair=='3-6': return ['1', '7-8']
+    elif out_port=='b':
+        if out_twistpair=='1-2': return ['1', '1-2']
+        if out_twistpair=='4-5': return ['3', '1-2']
+        if out_twistpair=='3-6': return ['1', '3-6']
+        if out_twistpair=='7-8': return ['2', '1-2']
+    elif out_port=='c':
+        if out_twistpair=='1-2': return ['2', '4-5']
+        if out_twistpair=='3-6': return ['2', '7-8']
+    elif out_port=='d':
+        if out_twistpair=='1-2': return ['3', '4-5']
+        if out_twistpair=='3-6': return ['3', '7-8']
+    else:
+        return False
+
+# convert how Phoebe labels loads to my convention (for sense check)
+def load_label_phoebe_to_me(lab):
+    splt = lab.split('_')
+    if 'dcb' in lab.lower():
+        if '25' in lab: # 2V5 only
+            return f'{splt[3]}_2V5_{splt[2]}-{splt[1]}'
+        else: # 1V5 only
+            return f'{splt[2]}_1V5_{splt[1]}'
+    else: # hybrids only
+        return f'{splt[2]}_{splt[3]}_{splt[4]}'
+
+# inverse of true_mirror: where a mag/IP True/Mirror PEPI is on side x
+def z_truemir_to_y_z(z, truemir, x='C'):
+    z = z.lower()
+    truemir = truemir.lower()
+    for y in ['top', 'bot']:
+        if true_mirror(x, y, z).lower()==truemir: return (y, z)
+    print(f'Couldn\'t identify {z}, {truemir}...')
+    return '??'
+
+def true_mirror(x, y, z):
+    if x=='C':
+        if y=='top':
+            if z=='mag': return 'True'
+            if z=='ip': return 'Mirror'
+            return '??'
+        if y=='bot':
+            if z=='mag': return 'Mirror'
+            if z=='ip': return 'True'
+            return '??'
+        return '??'
+    if x=='A':
+        if y=='top':
+            if z=='mag': return 'Mirror'
+            if z=='ip': return 'True'
+            return '??'
+        if y=='bot':
+            if z=='mag': return 'True'
+            if z=='ip': return 'Mirror'
+            return '??'
+        return '??'
+    return '??'
+
+def ppp_ret_pin(src_pin):
+    src = int(src_pin)
+    ret = src+8
+    return str(ret)
+
+def twisted_ret(twisted_src):
+    src = int(twisted_src)
+    ret = 'n/a'
+    if src==1: ret = '2'
+    elif src==4: ret = '5'
+    elif src==3: ret = '6'
+    elif src==7: ret = '8'
+    else: print('bad twisted src')
+    return ret
+
+def twistpair_order(tp):
+    if not tp in ['1-2', '4-5', '3-6', '7-8']: return -1
+    if tp=='1-2': return 1
+    if tp=='4-5': return 2
+    if tp=='3-6': return 3
+    if tp=='7-8': return 4
+
+def petr_filename_to_xyz(file):
+    # all filenames have same length; get rid of any parent folders
+    file = file[-15:]
+    x, y, z = file[0], file[1], file[2]
+    # change y,z to your naming convention
+    if y=='B': y='bot'
+    if y=='T': y='top'
+    if z=='M': z='mag'
+    if z=='I': z='ip'
+    return [x,y,z]
+
+# PPP color uniquely defined by where the Pos is: mag/IP and Pos num.
+def check_ppp_color(z, ppp, color):
+    ppp_num = int(ppp[1:])
+    if ppp_num <= 18:
+        if z=='mag':
+            if color!='blu': return False
+        if z=='ip':
+            if color!='grn': return False
+    else:
+        if z=='mag':
+            if color!='red': return False
+        if z=='ip':
+            if color!='yel': return False
+    return True
+
+# LVR pins that power slave loads (taking into account the lines which are
+# incorrectly assigned to slave loads); Phoebe's mapping is extremely annoying,
+# so just put in the slave lines by hand...
+slave_pins = {'43_J12_6', '43_J12_2', '43_J13_6', '43_J13_2',
+              '44_J12_6', '44_J12_2', '44_J13_6', '44_J13_2',
+              '53_J12_6', '53_J12_2', '53_J13_6', '53_J13_2',
+              '54_J12_6', '54_J12_2', '54_J13_6', '54_J13_2',
+              '45_J12_6', '45_J12_2', '55_J12_6', '55_J12_2',
+              '57_J12_6', '57_J12_2', '57_J13_6', '57_J13_2',
+              '58_J12_6', '58_J12_2', '58_J13_6', '58_J13_2',
+              '59_J12_6', '59_J12_2', '59_J13_6', '59_J13_2',
+              '60_J12_6', '60_J12_2', '60_J13_6', '60_J13_2',
+              '62_J12_6', '62_J12_2', '62_J13_6', '62_J13_2',
+              '63_J12_6', '63_J12_2', '63_J13_6', '63_J13_2',
+              '64_J12_6', '64_J12_2', '64_J13_6', '64_J13_2',
+              '61_J12_2', '61_J13_2',
+              '9_J12_6', '9_J12_2', '9_J13_6', '9_J13_2',
+              '10_J12_6', '10_J12_2', '10_J13_6', '10_J13_2',
+              '21_J12_6', '21_J12_2', '21_J13_6', '21_J13_2',
+              '22_J12_6', '22_J12_2', '22_J13_6', '22_J13_2',
+              '11_J12_6', '11_J12_2', '23_J12_6', '23_J12_2',
+              '25_J12_6', '25_J12_2', '25_J13_6', '25_J13_2',
+              '26_J12_6', '26_J12_2', '26_J13_6', '26_J13_2',
+              '27_J12_6', '27_J12_2', '27_J13_6', '27_J13_2',
+              '30_J12_6', '30_J12_2', '30_J13_6', '30_J13_2',
+              '28_J12_6', '28_J12_2', '28_J13_6', '28_J13_2',
+              '33_J12_6', '33_J12_2', '33_J13_6', '33_J13_2',
+              '31_J12_6', '31_J12_2', '31_J13_6', '31_J13_2',
+              '29_J12_2', '29_J13_2', '32_J12_2', '32_J13_2'}
+
+# returns True if there is a (A or M) load for the associated LVR ch, else False
+def senseline_used(lvr, con, twistpair, power_map):
+    # make sure that the corresponding power line exists, and then make sure it
+    # isn't a slave line
+    lvr_power_pin = f'{lvr}_{lvr_ch_to_pin(lvr_twistpair_to_ch(con, twistpair))}'
+    if not lvr_power_pin in power_map or lvr_power_pin in slave_pins: return False
+    return True
+
+
+####### Functions to Parse different sheets
+
+# columns of the line tables built below (one row per line, one column per
+# line attribute); lines_from_table turns a table into line objects
+line_table_cols = ['x', 'y', 'z', 'bp', 'bp_con', 'ibbp2b2', 'flex', 'load',
+                   'msa', 'ppp', 'ppp_pin', 'lvr', 'lvr_ch', 'length_c',
+                   'length_a', 'ppp_label', 'lvr_label', 'lvr_loads']
+
+# same as line.set_length, but for a whole column of lengths
+def length_col(lengths):
+    lengths = lengths.astype(str)
+    is_num = (lengths != 'splice') & ~lengths.str.contains('|', regex=False)
+    lengths[is_num] = lengths[is_num].map(one_dec_str)
+    return lengths
+
+# the lvr_loads of the lines of a DCB/hybrid sheet: the LVR + src pin of the
+# 'LVR ID - Connector - Pin' column ('22 - J13 - 4/3' -> '22_J13_4', like the
+# netlist keys) and the load (the LVR name, as on the label)
+lvr_src_pin = re.compile(r'^\s*(.+?)\s*-\s*(J\d+)\s*-\s*(\d+)')
+def lvr_loads_col(lvr_con_pin, lvr_name):
+    parts = lvr_con_pin.str.extract(lvr_src_pin)
+    lvr_src = (parts[0] + '_' + parts[1] + '_' + parts[2]).fillna(lvr_con_pin)
+    return [((src, load),) for src, load in zip(lvr_src, lvr_name)]
+
+def concat_tables(tables):
+    import pandas
+    if not tables: return pandas.DataFrame(columns=line_table_cols)
+    return pandas.concat(tables, ignore_index=True)
+
+# table of lines for a DCB sheet (as returned by parseDCBs)
+def dcb_table(df, x, y, z):
+    import pandas
+    lvr_name = df['LVR Name']
+    lvr_name_split = lvr_name.str.split('_', expand=True)
+    table = pandas.DataFrame(index=df.index)
+    table['x'], table['y'], table['z'] = x, y, z
+    table['bp'] = lvr_name_split[2].where(~lvr_name.str.contains('25', regex=False),
+                                          lvr_name_split[3])
+    table['bp_con'] = df['BP Connector']
+    table['ibbp2b2'] = df['iBB/P2B2 Connector']
+    table['flex'] = 'n/a' # DCBs
+    table['load'] = df['Voltage']
+    table['msa'] = df['M/S/A']
+    table['ppp'] = df['PPP Positronic']
+    table['ppp_pin'] = df['PPP Src/Ret'].str[0]
+    table['lvr'] = df['LVR ID'].astype(str)
+    table['lvr_ch'] = df['LVR Channel'].astype(str)
+    table['length_c'] = length_col(df['C L (m)'])
+    table['length_a'] = length_col(df['A L (m)'])
+    lvr_name = lvr_name.str.replace('_P/N_S', '', regex=False)
+    lvr_name = lvr_name.str.replace('_P/N', '', regex=False)
+    table['ppp_label'] = df['PPP Connector - Pin'] + ' | ' + lvr_name
+    table['lvr_label'] = df['LVR ID - Connector - Pin'] + ' ' + \
+                         df['SBC section'] + ' | ' + lvr_name
+    table['lvr_loads'] = lvr_loads_col(df['LVR ID - Connector - Pin'], lvr_name)
+    return table
+
+# table of lines for a hybrid sheet (as returned by parseHybrids)
+def hybrid_table(df, x, y, z):
+    import pandas
+    table = pandas.DataFrame(index=df.index)
+    table['x'], table['y'], table['z'] = x, y, z
+    table['bp'] = df['LVR Name'].str.split('_', expand=True)[2]
+    table['bp_con'] = df['BP Connector']
+    table['ibbp2b2'] = df['iBB/P2B2 Connector']
+    table['flex'] = df['SBC FLEX NAME']
+    table['load'] = df['4-asic group']
+    table['msa'] = df['M/S/A']
+    table['ppp'] = df['PPP Positronic']
+    table['ppp_pin'] = df['PPP Src/Ret'].str[0]
+    table['lvr'] = df['LVR ID'].astype(str)
+    table['lvr_ch'] = df['LVR Channel'].astype(int).astype(str)
+    table['length_c'] = length_col(df['C L (m)'])
+    table['length_a'] = length_col(df['A L (m)'])
+    lvr_name = df['LVR Name'].str.replace('_LV_SRC/RET', '', regex=False)
+    table['ppp_label'] = df['PPP Connector - Pin'] + ' | ' + lvr_name
+    table['lvr_label'] = df['LVR ID - Connector - Pin'] + ' ' + \
+                         df['SBC section'] + ' | ' + lvr_name
+    table['lvr_loads'] = lvr_loads_col(df['LVR ID - Connector - Pin'], lvr_name)
+    return table
+
+# returns the table of lines for the surface mapping
+def surface_table(file):
+    import pandas
+    dfs = xls_cache.read_sheets(file, usecols='A:G') # all the sheets, in one go
+    tables = []
+    for sheet in dfs:
+        if only_hyb_mag_mir:
+            if not 'C-mag-bot' in sheet:
+                continue
+        sheet_info = sheet.split('-')
+        x, y, z, bp = sheet_info[0], sheet_info[2], sheet_info[1], sheet_info[3]
+        df = dfs[sheet]
+        # get rid of empty rows
+        df = df.dropna(how='all')
+        if only_hyb_mag_mir:
+            df = df[~df['BP Connector'].str.contains('JD', regex=False)]
+        table = pandas.DataFrame(index=df.index)
+        table['x'], table['y'], table['z'], table['bp'] = x, y, z, bp
+        table['bp_con'] = df['BP Connector']
+        table['ibbp2b2'] = df['iBB/P2B2 Connector']
+        table['flex'] = df['SBC FLEX NAME'].fillna('n/a')
+        table['load'] = df['4ASIC-group (hybrid)/DCB power']
+        table['msa'] = df['M/S/A']
+        table['ppp'] = df['PPP Positronic']
+        table['ppp_pin'] = df['Positronic Src'].astype(str).str[0]
+        tables.append(table)
+    # LVR/length/label info isn't in the surface mapping
+    table = concat_tables(tables)
+    for col in ['lvr', 'lvr_ch', 'length_c', 'length_a']: table[col] = '-1'
+    for col in ['ppp_label', 'lvr_label']: table[col] = 'NA'
+    table['lvr_loads'] = [()]*len(table)
+    return table[line_table_cols]
+
+# the DCB and hybrid sheets of the cavern mapping, in order
+def cavern_sheets(sheets):
+    # separate dcb and hybrid sheets
+    dcb_sheets = fnmatch.filter( sheets, "DCB - *" )
+    hyb_sheets = fnmatch.filter( sheets, "Hybrid - *" )
+    if only_hyb_mag_mir:
+        dcb_sheets = []
+        hyb_sheets = [hyb_sheet for hyb_sheet in hyb_sheets if
+                      'Hybrid - Mag - Mirror' in hyb_sheet]
+    return dcb_sheets + hyb_sheets
+
+# where the PEPIs of a cavern sheet are on each side being checked (map from x
+# to y): each sheet is for one mag/IP True/Mirror PEPI type, on both sides,
+# and the titles over its length columns give where (eg. 'A-bot' over
+# 'A L (m)' and 'C-top' over 'C L (m)'). sheets without the titles are taken
+# to be on both sides, where their True/Mirror type says
+# (titles is the sheet's row of titles, from cavern_titles)
+side_title = re.compile(r'\s*([AC])\s*-\s*(top|bot)\s*', re.IGNORECASE)
+def cavern_sheet_sides(sheet, titles):
+    sheet_info = sheet.split(' - ')
+    expected = {x: z_truemir_to_y_z(sheet_info[1], sheet_info[2], x)[0] for x
+                in ['C', 'A']}
+    found = {}
+    for title in titles.values.flatten():
+        match = side_title.fullmatch(str(title))
+        if match: found[match.group(1).upper()] = match.group(2).lower()
+    if not found: found = expected
+    for x in found:
+        if found[x] != expected[x]:
+            print(f'{sheet} is titled {x}-{found[x]}, but {sheet_info[1]} '+
+                  f'{sheet_info[2]} is {x}-{expected[x]}??')
+    return {x: found[x] for x in sides if x in found}
+
+# the row of titles over the length columns of each of the cavern sheets (from
+# the same read of the sheets as their lines, see readWorkbook)
+def cavern_titles(file, sheets):
+    cells = readWorkbook(file)
+    return {sheet: sheetTitles(cells[sheet]) for sheet in sheets}
+
+# returns the table of lines for one (parsed) DCB or hybrid cavern sheet, with
+# the lines of each side in positions (from cavern_sheet_sides)
+def cavern_sheet_table(df, sheet, positions):
+    z = sheet.split(' - ')[1].lower()
+    sheet_table = dcb_table if sheet.startswith('DCB') else hybrid_table
+    return concat_tables([sheet_table(df, x, y, z) for x, y in positions.items()])
+
+# returns the table of lines for the cavern mapping (before combining splices)
+def cavern_table(file):
+    # dcb and hybrid sheets, separately
+    dfDCBs, dfHybrids = parseWorkbook(file)
+    dfs = {**dfDCBs, **dfHybrids}
+    sheets = cavern_sheets(list(dfs))
+    titles = cavern_titles(file, sheets)
+    tables = [cavern_sheet_table(dfs[sheet], sheet,
+                                 cavern_sheet_sides(sheet, titles[sheet]))
+              for sheet in sheets]
+    return concat_tables(tables)[line_table_cols]
+
+# identity of a line (see line.__eq__); spliced lines share it
+line_id_cols = line_table_cols[:11]
+
+# combine splice lines: the lines with length 'splice' are grouped by identity
+# and their LVR ch/label are added (' Y ' joined) to the (non-splice) line
+# with the same identity, ie. the line they are spliced to; the splice lines
+# are then dropped. returns the combined table and a table of the splice
+# groups that don't have exactly 1 line to be spliced to ('partners' col)
+def combine_splices(table):
+    is_splice = table['length_c'] == 'splice'
+    splices = table[is_splice].groupby(line_id_cols, sort=False).agg(
+        splice_lvr_ch=('lvr_ch', ' Y '.join),
+        splice_lvr_label=('lvr_label', '   Y   '.join),
+        splice_lvr_loads=('lvr_loads', lambda loads: sum(loads, ())))
+    partners = table[~is_splice].groupby(line_id_cols).size()
+    splices['partners'] = partners.reindex(splices.index, fill_value=0).values
+    combined = table[~is_splice].merge(splices.reset_index(), how='left',
+                                       on=line_id_cols)
+    spliced = combined['splice_lvr_ch'].notna()
+    combined.loc[spliced, 'lvr_ch'] = combined['lvr_ch'] + ' Y ' + \
+                                      combined['splice_lvr_ch']
+    combined.loc[spliced, 'lvr_label'] = combined['lvr_label'] + '   Y   ' + \
+                                         combined['splice_lvr_label']
+    combined.loc[spliced, 'lvr_loads'] = combined.loc[spliced, 'lvr_loads'] + \
+                                         combined.loc[spliced, 'splice_lvr_loads']
+    splice_errors = splices[splices['partners'] != 1].reset_index()
+    return combined[line_table_cols], splice_errors
+
+# adapter from a line table to the list of line objects used by the checks
+def lines_from_table(table):
+    lines = []
+    for row in zip(*[table[col] for col in line_table_cols]):
+        l = line(*row[:11])
+        l.set_lvr(row[11], row[12])
+        l.length_c, l.length_a = row[13], row[14] # already formatted
+        l.set_labels(row[15], row[16])
+        l.lvr_loads = row[17]
+        lines.append(l)
+    return lines
+
+# returns a list of lines for surface mapping
+def parse_surface(file):
+    table = surface_table(file)
+    prof.count('rows parsed', len(table))
+    return lines_from_table(table)
+
+# the same line, on the equivalent PEPI (same mag/IP and True/Mirror) of side x
+def line_on_side(l, x):
+    y, z = z_truemir_to_y_z(l.z, true_mirror(l.x, l.y, l.z), x)
+    new_line = line(x, y, z, l.bp, l.bp_con, l.ibbp2b2, l.flex, l.load, l.msa,
+                    l.ppp, l.ppp_pin)
+    new_line.set_lvr(l.lvr, l.lvr_ch)
+    new_line.length_c, new_line.length_a = l.length_c, l.length_a
+    new_line.set_labels(l.ppp_label, l.lvr_label)
+    new_line.lvr_loads = l.lvr_loads
+    return new_line
+
+# the nominal lines of the sides being checked; a side that isn't in the
+# nominal mapping (the surface mapping is C side only) is equivalent to the
+# other one, PEPI by PEPI
+def side_nominal_lines(nominal_lines):
+    side_lines = {}
+    for l in nominal_lines: side_lines.setdefault(l.x, []).append(l)
+    lines = []
+    for x in sides:
+        if x in side_lines: lines += side_lines[x]
+        elif side_lines:
+            lines += [line_on_side(l, x) for l in next(iter(side_lines.values()))]
+    return lines
+
+
+# returns a list of lines for cavern mapping
+def parse_cavern(file):
+    table = cavern_table(file)
+    prof.count('rows parsed', len(table))
+    table_combined, splice_errors = combine_splices(table)
+    prof.count('splices resolved', len(table) - len(table_combined))
+    for message in splice_messages(splice_errors): print(message)
+    return lines_from_table(table_combined)
+
+def splice_messages(splice_errors):
+    return [f'Splice problem?? {err.x+err.y+err.z+err.bp+err.bp_con}'+
+            f'{err.ibbp2b2+err.flex+err.load+err.msa} {err.ppp}:{err.ppp_pin} '+
+            f'({err.splice_lvr_label}) spliced to {err.partners} lines'
+            for err in splice_errors.itertuples(index=False)]
+
+# a swap file either has one sheet per PEPI (named eg. 'C-bot-mag', as written
+# by the swap planner, see swap_planner.py), moving all the lines of that PEPI
+# on each Positronic, or (hand written) one sheet moving the HMM Positronics
+# (the hybrid lines of C-bot-mag only, so it moves nothing on the A side)
+pepi_sheet = re.compile(r'([AC])-(top|bot)-(ip|mag)')
+hmm_pepi = ('C', 'bot', 'mag')
+
+# the rows of a swap file: (sheet, row, PEPI (x, y, z) or None for the HMM
+# sheet, Positronic #, swap to #), the numbers None if they aren't numbers
+def swap_table(file):
+    sheets = xls_cache.sheet_names(file)
+    swap_sheets = [sheet for sheet in sheets if pepi_sheet.fullmatch(sheet)]
+    if not swap_sheets: swap_sheets = sheets[:1] # only 1 sheet
+    table = []
+    for swap_sheet in swap_sheets:
+        pepi = pepi_sheet.fullmatch(swap_sheet)
+        if pepi is not None: pepi = pepi.groups()
+        df = xls_cache.read_excel(file, swap_sheet, usecols='A,D')
+        for ind, pos, to in zip(df.index, df['Positronic'], df['Swap to']):
+            table.append((swap_sheet, ind+2, pepi, positronic_number(pos),
+                          positronic_number(to)))
+    prof.count('rows parsed', len(table))
+    return table
+
+def positronic_number(value):
+    try: return int(str(value).strip().lstrip('P'))
+    except ValueError:
+        try: return int(float(value)) # eg. 1.0
+        except (ValueError, OverflowError): return None
+
+# the lines on each Positronic, by (x, y, z, Positronic), with their position
+# in lines (so that the moved lines can be kept in the order of the lines)
+def index_positronics(lines):
+    index = {}
+    for i, l in enumerate(lines): index.setdefault((l.x, l.y, l.z, l.ppp), []).append((i, l))
+    return index
+
+# where the swap table moves the lines of each (x, y, z, Positronic) of the
+# indexed lines (and whether all its lines move, see moves_line), the
+# problems with the table (rows of swap_problems.csv):
+#   Not a Positronic  the Positronic or the swap to isn't a number
+#   Duplicate         the Positronic was already swapped by an earlier row (that
+#                     row is kept)
+#   Unknown           no lines to move on the Positronic
+#   Collision         moved into a slot that another Positronic is moved to, or
+#                     that has lines which stay there
+# and the cycles of swaps (eg. P1 -> P6 -> P1), which are fine (any plan moving
+# more than one Positronic has them), but need a free slot for the shifters to
+# do them; each as (sheet, row of its first Positronic, PEPI, cycle)
+# the HMM sheet only moves the hybrid lines of C-bot-mag, so it's checked for
+# that PEPI
+def validate_swaps(table, index):
+    pepis = sorted({key[:3] for key in index})
+    swaps = {}
+    rows = {} # (x, y, z, Positronic) -> swap table row
+    problems = []
+    def problem(row, pepi, what):
+        problems.append([row[0], row[1], '-'.join(pepi or hmm_pepi),
+                         row[3], row[4], what])
+    for row in table:
+        sheet, ind, pepi, pos, to = row
+        if pos is None and to is None: continue # empty row
+        if not (pepi or hmm_pepi) in pepis: continue # other side
+        if pos is None or to is None:
+            problem(row, pepi, 'Not a Positronic')
+            continue
+        key = (pepi or hmm_pepi) + (f'P{pos}',)
+        if key in swaps:
+            problem(row, pepi, f'Duplicate (of row {rows[key][1]})')
+        elif any(moves_line(l, pepi is not None) for i, l in index.get(key, [])):
+            swaps[key] = (f'P{to}', pepi is not None)
+            rows[key] = row
+        elif pos != to: problem(row, pepi, 'Unknown')
+    # the Positronics moved into each slot, and the lines staying in it
+    into = {}
+    for key, (to, all_lines) in swaps.items():
+        into.setdefault(key[:3] + (to,), []).append(key)
+    for slot, keys in into.items():
+        staying = [l for i, l in index.get(slot, []) if
+                   not (slot in swaps and moves_line(l, swaps[slot][1]))]
+        for key in keys:
+            if key==slot: continue
+            others = [k[3] for k in keys if k!=key] + (['lines that stay'] if
+                                                       staying else [])
+            if others:
+                problem(rows[key], key[:3], f'Collision (into {slot[3]}, '+
+                        f'with {" and ".join(others)})')
+    cycles = []
+    seen = set()
+    for key in swaps:
+        path = []
+        while key in swaps and not key in seen:
+            seen.add(key)
+            path.append(key)
+            key = key[:3] + (swaps[key][0],)
+        if key in path and len(path) - path.index(key) > 1:
+            cycle = path[path.index(key):]
+            row = rows[cycle[0]]
+            cycles.append([row[0], row[1], '-'.join(key[:3]),
+                           ' -> '.join(k[3] for k in cycle + [cycle[0]])])
+    prof.count('lookups', len(table) + len(swaps))
+    return swaps, problems, cycles
+
+# if the swap of a Positronic moves line l: all the lines of a PEPI sheet, only
+# the hybrid lines of C-bot-mag for the HMM sheet
+def moves_line(l, all_lines):
+    if all_lines: return True
+    return (l.x, l.y, l.z)==hmm_pepi and l.flex!='n/a' # don't move non-HMM Pos!
+
+# the lines on the Positronics of the swap table, moved by the swaps (see
+# validate_swaps), in the order of the indexed lines; the lines of the
+# Positronics that a HMM sheet row doesn't move (eg. of the other C-side
+# PEPIs) are kept, unmoved. each Positronic only once, even if in the table again
+def apply_swaps(table, swaps, index):
+    pepis = sorted({key[:3] for key in index})
+    moved = []
+    done = set()
+    for sheet, ind, pepi, pos, to in table:
+        if pos is None or to is None: continue
+        if pepi is None and not hmm_pepi in pepis: continue # A side
+        keys = [x_y_z + (f'P{pos}',) for x_y_z in
+                ([pepi] if pepi is not None else pepis)]
+        keys = [key for key in keys if key in index and not key in done]
+        done.update(keys)
+        for i, l in sorted((entry for key in keys for entry in index[key]),
+                           key=lambda entry: entry[0]):
+            key = (l.x, l.y, l.z, l.ppp)
+            pos_tmp = l.ppp
+            if key in swaps and moves_line(l, swaps[key][1]): pos_tmp = swaps[key][0]
+            ml = line(l.x, l.y, l.z, l.bp, l.bp_con, l.ibbp2b2, l.flex,
+                      l.load, l.msa, pos_tmp, l.ppp_pin)
+            ml.set_lvr(l.lvr, l.lvr_ch)
+            ml.set_length(l.length_c, l.length_a)
+            ml.set_labels(l.ppp_label, l.lvr_label) # don't move ppp_label!
+            ml.lvr_loads = l.lvr_loads
+            moved.append(ml)
+    prof.count('lines moved', len(moved))
+    return moved
+
+# return the cavern_lines with PPP positronic swapped according to input file
+# (with the problems of the swap table)
+def parse_swap_pos(file, cavern_lines):
+    table = swap_table(file)
+    index = index_positronics(cavern_lines)
+    swaps, problems, cycles = validate_swaps(table, index)
+    return apply_swaps(table, swaps, index), problems
+
+# read an OrCAD PCB II netlist (as used for Phoebe's PEPI and the tBB
+# schematics) in one pass over the (memory-mapped) file; returns a map from
+# component (eg. 'J12_LVReg_X-Y_1.2_37') to its footprint and its map from pin
+# to net. the result is cached, like the workbook sheets
+def read_netlist(netlist):
+    return xls_cache.cached(netlist, 'netlist', lambda: tokenize_netlist(netlist))
+
+def tokenize_netlist(netlist):
+    components = {}
+    pins = None
+    with open(netlist, 'rb') as f, \
+         mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for row in iter(mm.readline, b''):
+            tokens = row.decode().split()
+            if len(tokens) < 2 or tokens[0] != '(': continue
+            if row.startswith(b'  ('): # ( pin net )
+                if pins is not None and len(tokens) >= 3: pins[tokens[1]] = tokens[2]
+            elif len(tokens) >= 4: # ( id footprint component value...
+                pins = {}
+                components[tokens[3]] = {'footprint': tokens[2], 'pins': pins}
+    return components
+
+# parse Phoebe's netlists; return a map of LVR ch to load
+def parse_netlist(netlist):
+    lvrch_load = {}
+    components = read_netlist(netlist)
+    prof.count('rows parsed', len(components))
+    for conn, comp in components.items():
+        if not 'PCBComponent' in comp['footprint']: continue
+        conn_parts = conn.split('_')
+        lvr_out_con = conn_parts[0]
+        lvr = conn_parts[-1]
+        for pin, net in comp['pins'].items():
+            if 'J1' in net: continue # connections between LVR connectors
+            if ("_SRC" in net) or (net.endswith("_P")):
+                if("PT_" in net) or ("DCB_" in net):
+                    load = net
+                    load = load.replace('_LV_SRC','')
+                    load = load.replace('_25_P', '_25')
+                    load = load.replace('_b_P', '_b')
+                    load = load.replace('_a_P', '_a')
+                    lvrch_load[f'{lvr}_{lvr_out_con}_{pin[-1]}'] = load
+    return lvrch_load
+
+# one LVR ch of a (possibly Y spliced) line, as Petr separates spliced lines
+# into different entries; refers to the line instead of copying it
+class split_line:
+
+    __slots__ = ('line', 'lvr_ch', 'lvr_label')
+
+    def __init__(self, line, lvr_ch, lvr_label):
+        self.line = line
+        self.lvr_ch = lvr_ch
+        self.lvr_label = lvr_label
+
+    x = property(lambda self: self.line.x)
+    y = property(lambda self: self.line.y)
+    z = property(lambda self: self.line.z)
+    ppp = property(lambda self: self.line.ppp)
+    ppp_pin = property(lambda self: self.line.ppp_pin)
+    lvr = property(lambda self: self.line.lvr)
+    length_c = property(lambda self: self.line.length_c)
+
+# map from (x, y, z, lvr, lvr ch) to the split lines of the given lines, for
+# checking Petr's LVR labels
+def index_split_lines(lines):
+    index = {}
+    for l in lines:
+        lvr_ch_split = l.lvr_ch.split(' Y ')
+        lvr_label_split = l.lvr_label.split('   Y   ')
+        for i in range(len(lvr_ch_split)):
+            # make sure the ch number is an int string, not float...
+            ch = str(int(float(lvr_ch_split[i])))
+            sl = split_line(l, ch, lvr_label_split[i])
+            index.setdefault((sl.x, sl.y, sl.z, sl.lvr, sl.lvr_ch), []).append(sl)
+    return index
+
+# parse and check Petr's LVR labels against the split lines in split_index (see
+# index_split_lines); writes the lines that agree to the _alex.txt file, and
+# returns the messages to print and the rows for the mismatch report
+def parse_check_petr_lvr(file, split_index):
+    my_txt = file[:-4]+'_alex.txt'
+    if alex_dir is not None: my_txt = os.path.join(alex_dir, os.path.basename(my_txt))
+    messages = []
+    report = []
+    my_txt_lines = []
+    with open(file) as f:
+        xyz = petr_filename_to_xyz(file)
+        x, y, z = xyz[0], xyz[1], xyz[2]
+        lvr = ''
+        for txt_line in f.readlines():
+            # set the lvr number!
+            if 'LVR ' in txt_line:
+                my_txt_lines.append('\n'+txt_line)
+                lvr = (txt_line.split())[1]
+            # skip useless lines
+            if not ('J12' in txt_line or 'J13' in txt_line): continue
+            txt_line_split = txt_line.split()
+            lvr_ch = txt_line_split[0]
+            lvr_pin = txt_line_split[1]
+            ppp = txt_line_split[2]
+            ppp_pin = txt_line_split[3][0] # only src pin
+            ppp_color = txt_line_split[4]
+            sbc_sec = txt_line_split[5]
+            length_c = txt_line_split[6]
+            # sometimes Petr converts floats to ints...
+            if not '|' in length_c: length_c = str(float(length_c))
+            petr = (f'LVR{lvr} ch{lvr_ch} (pin {lvr_pin}) '+
+                    f'Pos{ppp}:{ppp_pin} PPPReg:{ppp_color} '+
+                    f'SBCReg:{sbc_sec} L:{length_c}')
+
+            # find the correct line by xyz+lvr+lvr_ch
+            # once found, check everything else is right
+            correct_lines = split_index.get((x, y, z, lvr, lvr_ch), [])
+            for correct_line in correct_lines:
+                split_label_lvr = ((correct_line.lvr_label).split(' | '))[0]
+                split_label_lvr = split_label_lvr.split()
+                correct_line_lvr_pin = split_label_lvr[2]+'_'+split_label_lvr[4]
+                correct_line_sbc = split_label_lvr[5]
+                if not (ppp==correct_line.ppp and
+                        ppp_pin==correct_line.ppp_pin and
+                        check_ppp_color(z, ppp, ppp_color) and
+                        lvr_pin==correct_line_lvr_pin and
+                        sbc_sec==correct_line_sbc and
+                        length_c==correct_line.length_c):
+                    me = (f'LVR{correct_line.lvr} ch{correct_line.lvr_ch} '+
+                          f' (pin {correct_line_lvr_pin}) '+
+                          f'Pos{correct_line.ppp}:{correct_line.ppp_pin} '+
+                          # f'PPPReg:{correct_line.ppp_color} '+
+                          f'SBCReg:{correct_line_sbc} '+
+                          f'L:{correct_line.length_c}')
+                    messages.append(f'rest of {x}{y}{z} LVR{lvr} ch{lvr_ch} line '+
+                                    'doesn\'t agree...')
+                    messages.append(f'Petr: {petr}')
+                    messages.append(f'Me: {me}')
+                    report.append([file, x+y+z, lvr, lvr_ch, 'Disagrees', petr, me])
+            count = len(correct_lines)
+            if count < 1:
+                messages.append(f'Couldn\'t find {x}{y}{z} LVR{lvr} ch{lvr_ch}')
+                report.append([file, x+y+z, lvr, lvr_ch, 'Not found', petr, ''])
+            elif count > 1:
+                messages.append(f'Found multiple {x}{y}{z} LVR{lvr} ch{lvr_ch}')
+                report.append([file, x+y+z, lvr, lvr_ch, f'Found {count}', petr, ''])
+            else: my_txt_lines.append(txt_line)
+    # write to a temporary file first, so that a half-written file is never
+    # left behind
+    tmp_txt = f'{my_txt}.{os.getpid()}.tmp'
+    with open(tmp_txt, 'w') as mf: mf.writelines(my_txt_lines)
+    os.replace(tmp_txt, my_txt)
+    return messages, report
+
+# parse and check Petr's PPP labels; actually, skip this
+def parse_check_petr_ppp(file, correct_lines):
+    return
+
+# parse the cavern sense table, outputting a list of senseline objects for
+# each twisted pair (in 1 SB)
+def parse_cavern_sense(file, power_map):
+    sheets = xls_cache.sheet_names(file)
+    senselines = []
+    sheet = sheets[0] # only 1 sheet
+    df = xls_cache.read_excel(file, sheet, usecols='A:J')
+    prof.count('rows parsed', len(df))
+    # index the layout table once by LVR port, by splitter label+output, and
+    # by splitter input, so that tracing each line is just a few lookups
+    by_port = {}
+    by_spltr_out = {}
+    by_spltr_in = {}
+    for row in df.to_dict('records'):
+        by_port.setdefault(row['LVR Port'], []).append(row)
+        by_spltr_out.setdefault((row['Splitter/Cable Label'],
+                                 row['Splitter/Cable Output']), []).append(row)
+        by_spltr_in.setdefault(row['Splitter/Cable Input'], []).append(row)
+    # the LVRs (1-67 in the real schematics) that power something
+    lvrs = sorted({int(lvr_pin.split('_')[0]) for lvr_pin in power_map})
+    for lvr in lvrs:
+        for con in ['J10', 'J16']:
+            for twistpair_out in ['1-2', '4-5', '3-6', '7-8']:
+                if senseline_used(lvr, con, twistpair_out, power_map):
+                    # found sense line that should exist, so trace it through
+                    # the cavern sense (layout) map
+                    # throughout, take advantage of the formatting choices
+                    # in underground_LVsense_layout_table.xlsx
+                    out_row = sense_layout_row(by_port, f'{lvr}_{con}')
+                    if out_row is None: continue
+                    crate = out_row['Crate Number (of LVR)']
+                    slot = out_row['Crate Slot Number']
+                    spltr = out_row['Splitter/Cable Label']
+                    spltr_out = out_row['Splitter/Cable Output']
+                    spltr_type = get_spltr_type(spltr)
+                    spltr_in_pair = ['-', twistpair_out] # direct cable
+                    in_row = out_row # direct cable
+                    if spltr_type=='1':
+                        spltr_in_pair = spltr1(spltr_out, twistpair_out)
+                        in_row = sense_layout_row(by_spltr_out, (spltr, 'a'))
+                    elif spltr_type=='2':
+                        spltr_in_pair = spltr2(spltr_out, twistpair_out)
+                        in_row = sense_layout_row(by_spltr_in, f'{spltr}_{spltr_in_pair[0]}')
+                    elif spltr_type=='3':
+                        spltr_in_pair = spltr3(spltr_out, twistpair_out)
+                        in_row = sense_layout_row(by_spltr_in, f'{spltr}_{spltr_in_pair[0]}')
+                    elif spltr_type=='4':
+                        spltr_in_pair = spltr4(spltr_out, twistpair_out)
+                        in_row = sense_layout_row(by_spltr_out, (spltr, 'a'))
+                    elif spltr_type=='6':
+                        spltr_in_pair = spltr6(spltr_out, twistpair_out)
+                        in_row = sense_layout_row(by_spltr_in, f'{spltr}_{spltr_in_pair[0]}')
+                    else:
+                        if not spltr_type=='direct': print('dont recognize spltr...')
+                    if spltr_in_pair==False: print('\n\nThis shouldnt happen...\n\n')
+                    if in_row is None: continue
+                    label_in = in_row['Sense Line Label']
+                    ppp_true = in_row['True PPP RJ45 Coupler']
+                    ppp_mir = in_row['Mirror PPP RJ45 Coupler']
+                    tbb_con = in_row['tBB Port']
+                    senselines.append(senseline(crate, slot, str(lvr), con,
+                    twistpair_out, spltr, spltr_out, spltr_in_pair[0],
+                    spltr_in_pair[1], label_in, ppp_true, ppp_mir, tbb_con))
+    return senselines
+
+# the one row of the sense layout table with the given key in index (built in
+# parse_cavern_sense), or None if there isn't exactly one
+def sense_layout_row(index, key):
+    rows = index.get(key, [])
+    if len(rows) != 1:
+        print(f'\n\n!!! Found {len(rows)} sense layout rows for {key}...\n\n')
+        return None
+    return rows[0]
+
+# parse tBB netlist, returning a map from tBB connector+twisted pair to sensed
+# load
+def parse_tbb(netlist):
+    tbb_con_load = {}
+    components = read_netlist(netlist)
+    for con in [f'J{num}' for num in range(1,22)]:
+        if not con in components: continue
+        pins = components[con]['pins']
+        for src in [1, 4, 3, 7]: # only P
+            net = pins.get(str(src), f'Net{con}')
+            if not f'Net{con}' in net: # active sense line
+                net_split = net.split('_')
+                flex = 'n/a' # dcb
+                load = 'n/a' # set explicitly for hybrids and dcbs
+                if 'JP' in net_split[0]: # hybrid
+                    flex = bp_con_JP_to_alt(net_split[0], True)
+                    load = net_split[2]
+                    if 'WEST' in net: load += 'W'
+                    if 'EAST' in net: load += 'E'
+                else: # dcb
+                    load = f'{net_split[0][2:]}' # 1V5
+                    # may as well take advantage of 'flex' to store redundant info
+                    flex = net_split[2]
+                    if '2V5' in net:
+                        load = f'{net_split[0][2:]}-{net_split[1]}'
+                        flex = net_split[3]
+                tbb_con_load[f'{con}_{src}-{twisted_ret(src)}'] = f'{flex}_{load}'
+    return tbb_con_load
+
+
+# the parsed (single argument) input file, from the session: parsed by its
+# parse_func the first time it's asked for in a run, and shared after that
+def parse_input(file):
+    return session.parse(file, parse_func[file])
+
+# Associate files with a function for parsing
+parse_func = {}
+def set_parse_funcs(files):
+    for file in files:
+        if 'surface_LV_power_tests' in file: parse_func[file]=parse_surface
+        elif 'LVR_PPP_Underground' in file: parse_func[file]=parse_cavern
+        elif 'lvr_testing' in file: continue # known, but not compared (yet)
+        elif 'swap_positronic' in file: parse_func[file]=swap_table
+        elif 'PEPI_' in file: parse_func[file]=parse_netlist
+        elif 'CBM_LVR' in file: parse_func[file]=parse_check_petr_lvr
+        elif 'CBM_PPP' in file: parse_func[file]=parse_check_petr_ppp # also nada
+        elif 'CBI_LVR' in file: parse_func[file]=parse_check_petr_lvr
+        elif 'CTM_LVR' in file: parse_func[file]=parse_check_petr_lvr
+        elif 'CTI_LVR' in file: parse_func[file]=parse_check_petr_lvr
+        elif 'underground_LVsense_layout' in file: parse_func[file]=parse_cavern_sense
+        elif 'TelemetryBB_Mirror_FINAL_mpeco' in file: parse_func[file]=parse_tbb
+        else:
+            if file=='NA': continue
+            print(f'\n\nDON\'T RECONGNIZE {file} FORMAT\n\n')
+
+
+# def print_ppp_corrected_cavern_lines(xlfile, cav_to_nom):
+#     return True
+
+# rows of a PPP table (ppp_fixes, ppp_fixes_flipped, move_labels): the header,
+# then the rows sorted by layer (first letter of the flex: DCB/X/S), then by
+# positronic and pins (keeping the given order otherwise), with an empty row
+# before each new positronic. pop_cols maps each extra column to the positronic
+# column it counts the populated pins of (not counting spliced lines, ie. with
+# length_col 'splice')
+def ppp_table_rows(header, rows, pos_col, pins_col, layer_col, pop_cols={},
+                   length_col='C Len (m)'):
+    pos_ind = header.index(pos_col)
+    pins_ind = header.index(pins_col)
+    layer_ind = header.index(layer_col)
+    len_ind = header.index(length_col)
+    pops = []
+    for count_col in pop_cols.values():
+        count_ind = header.index(count_col)
+        pops.append((count_ind, collections.Counter(r[count_ind] for r in rows
+                                                    if r[len_ind] != 'splice')))
+    yield header + list(pop_cols)
+    empty_row = [' ' for j in range(len(header) + len(pop_cols))]
+    prev_ppp = 'P0'
+    for r in sorted(rows, key=lambda r: (r[layer_ind][0], int(r[pos_ind][1:]),
+                                         r[pins_ind])):
+        if r[pos_ind] != prev_ppp: yield empty_row
+        prev_ppp = r[pos_ind]
+        yield r + [count[r[count_ind]] for count_ind, count in pops]
+
+# write a PPP table (see ppp_table_rows) row by row
+def write_ppp_table(file, header, rows, pos_col, pins_col, layer_col, pop_cols={}):
+    written = 0
+    with open(file, 'w') as f:
+        writer = csv.writer(f)
+        for row in ppp_table_rows(header, rows, pos_col, pins_col, layer_col,
+                                  pop_cols):
+            writer.writerow(row)
+            written += 1
+    prof.count('rows written', written)
+
+# split the rows of a fixme report by PEPI (of the side being checked), using its True/Mir and
+# Mag/IP columns; returns the map from sheet name (eg. 'C-mag-top') to rows, in
+# the order of the CCTB tables
+def split_rows_pepi(header, rows):
+    truemir_ind = header.index('True/Mir')
+    z_ind = header.index('Mag/IP')
+    pepis = {f'{side}-{z}-{y}': [] for y in ['top', 'bot'] for z in ['ip', 'mag']}
+    for r in rows:
+        y, z = z_truemir_to_y_z(r[z_ind], r[truemir_ind], side)
+        pepis[f'{side}-{z}-{y}'].append(r)
+    return pepis
+
+# write the xlsx version of a fixme report (see the -xlsx option), for the
+# shifters: tables maps each sheet to its rows (header first), which are
+# streamed to the workbook with xlsxwriter's constant_memory mode. columns are
+# formatted like parse_xls.format_columns (centred, sized to their header)
+def write_xlsx(file, tables):
+    import xlsxwriter # only needed for the xlsx reports
+    with xlsxwriter.Workbook(file, {'constant_memory': True,
+                                    'strings_to_numbers': True}) as workbook:
+        cell_format = workbook.add_format()
+        cell_format.set_align('center')
+        cell_format.set_align('vcenter')
+        for sheet, rows in tables.items():
+            worksheet = workbook.add_worksheet(sheet)
+            written = 0
+            for row in rows:
+                if written == 0:
+                    for col, name in enumerate(row):
+                        width = 50 if 'Label' in name else max(len(name)+2, 8)
+                        worksheet.set_column(col, col, width, cell_format)
+                    worksheet.freeze_panes(1, 0)
+                worksheet.write_row(written, 0, row)
+                written += 1
+            prof.count('rows written', written)
+
+# columns of ppp_fixes.csv (and ppp_fixes_flipped.csv); the population
+# columns are added by ppp_table_rows
+ppp_fixes_cols = ['True/Mir', 'Mag/IP', 'BP', 'BP Con.', 'iBB/P2B2 Con.',
+                  'SBC Flex Name', '4-asic group / DCB power', 'M/S/A',
+                  'Cav. Map. PPP Pos.', 'Cav. Map. PPP Pins',
+                  'Surf. Map. PPP Pos.', 'Surf. Map. PPP Pins', 'LVR', 'LVR Ch.',
+                  'C Len (m)', 'A Len (m)']
+ppp_fixes_pop_cols = {'Cav. Map. PPP Pop.': 'Cav. Map. PPP Pos.',
+                      'Surf. Map. PPP Pop.': 'Surf. Map. PPP Pos.'}
+
+# rows of ppp_fixes.csv for the (cav line, nom line) pairs
+def ppp_fixes_rows(pairs):
+    rows = []
+    for cl, nl in pairs:
+        rows.append([true_mirror(cl.x, cl.y, cl.z), cl.z, cl.bp, cl.bp_con,
+                     cl.ibbp2b2, cl.flex, cl.load, cl.msa, cl.ppp,
+                     cl.ppp_pin + ',' + ppp_ret_pin(cl.ppp_pin),
+                     nl.ppp, nl.ppp_pin + ',' + ppp_ret_pin(nl.ppp_pin),
+                     cl.lvr, cl.lvr_ch, cl.length_c, cl.length_a])
+    return rows
+
+# map from (y, z) to the lines of that PEPI (of one side), so that the lines only
+# have to be gone through once for all the PEPI tables
+def partition_lines_pepi(lines):
+    pepi_lines = {}
+    for l in lines: pepi_lines.setdefault((l.y, l.z), []).append(l)
+    return pepi_lines
+
+# outputs a list of rows to be printed for cctb testing tables. one sheet per
+# PEPI (lines are one PEPI from partition_lines_pepi)
+# order by BP first (gamma, beta, alpha), then by DCB/X hyb/S hyb, then by Pos
+def organize_cctb_table(lines):
+    rows = []
+    for cl in lines:
+        rows.append([cl.ppp, cl.ppp_pin, ppp_ret_pin(cl.ppp_pin), cl.bp,
+                     cl.bp_con, cl.flex, cl.load, cl.get_lvr_pins(), cl.lvr,
+                     cl.lvr_ch, cl.msa, '', '', '', '', ''])
+    # order rows (BP in reverse alphabetical order), add headers
+    bp_order = {bp: i for i, bp in enumerate(sorted({r[3] for r in rows},
+                                                    reverse=True))}
+    rows.sort(key=lambda r: (bp_order[r[3]], r[5][0].lower(), int(r[0][1:]),
+                             r[1]))
+    rows.insert(0, ['PPP Label', 'Pos. Src', 'Pos. Ret', 'Backplane',
+                    'BP Con.', 'Flex Name', '4ASIC-group/DCB power', 'SBC Label',
+                    'LVR Logical ID', 'LVR ch.', 'M/S/A', 'Connector on CCTB',
+                    'Measured Voltage', 'Measured Current', 'Result', 'Comments'])
+    return rows
+
+# path of a fixme file; the A side ones get an '_A_side' suffix, the C side
+# ones keep their names
+def fixme_file(name):
+    if side!='C':
+        root, ext = os.path.splitext(name)
+        name = f'{root}_{side}_side{ext}'
+    return os.path.join(fixme_dir, name)
+
+def output_file(name):
+    return os.path.join(output_dir, name)
+
+def write_csv(file, rows):
+    with open(file, 'w') as f:
+        writer = csv.writer(f)
+        for row in rows: writer.writerow(row)
+
+# write the csv files (map from file to rows) with a pool of threads
+def write_csvs(tables):
+    prof.count('rows written', sum(len(rows) for rows in tables.values()))
+    with concurrent.futures.ThreadPoolExecutor() as pool:
+        for written in [pool.submit(write_csv, file, rows) for file, rows in
+                        tables.items()]:
+            written.result() # raise any errors
+
+# index power lines for matching them to sense lines (see
+# line.corresponds_sense) by (z, True/Mirror, LVR, ch); each ch of a Y spliced
+# line gets its own entry
+def index_power_lines_sense(power_lines):
+    index = {}
+    for pl in power_lines:
+        truemir = true_mirror(pl.x, pl.y, pl.z)
+        # some lvr channels still carry around the '.0'...
+        chs = [str(int(float(ch))) for ch in pl.lvr_ch.split(' Y ')]
+        for ch in dict.fromkeys(chs):
+            index.setdefault((pl.z, truemir, pl.lvr, ch), []).append(pl)
+    return index
+
+# LVRs 1-36 power the mag PEPIs, the rest (37-67) the IP ones
+mag_lvrs = set(range(1, 37))
+
+# outputs a list of rows to be printed for cctb sense line testing tables. one
+# sheet per true/mir PEPI type and per mag/IP (so 4 sheets total)
+# order individual sheets by PPP connector
+# power_index is from index_power_lines_sense; sense lines without exactly one
+# corresponding power line are added to match_errors
+def organize_cctb_sense_table(senselines, truemir, power_index, match_errors):
+    rows_mag = []
+    rows_ip = []
+    res = []
+    for sl in senselines:
+        z = 'mag'
+        if not int(sl.lvr) in mag_lvrs: z = 'ip'
+        row = []
+        if truemir=='True': ppp = sl.ppp_true
+        elif truemir=='Mirror': ppp = sl.ppp_mir
+        else: print('you formatted truemir wrong')
+        ch = lvr_twistpair_to_ch(sl.lvr_con, sl.lvr_twistpair)
+        power_lines = power_index.get((z, truemir, sl.lvr, ch), [])
+        if len(power_lines) != 1:
+            match_errors.append([z, truemir, sl.lvr, ch, len(power_lines)])
+        cor_pl = line('n/a', 'n/a', 'n/a', 'n/a', 'n/a', 'n/a', 'n/a', 'n/a', 'n/a',
+                      'n/a', 'n/a')
+        if power_lines: cor_pl = power_lines[-1]
+        row = [cor_pl.flex, cor_pl.load, ppp, f' {sl.in_twistpair}', sl.in_label, 
+               sl.in_spltr_lab(), sl.out_spltr_lab(), sl.lvr_con, sl.lvr,
+               lvr_twistpair_to_ch(sl.lvr_con, sl.lvr_twistpair), cor_pl.msa, '', '',
+               '', '']
+        if z=='mag': rows_mag.append(row)
+        else: rows_ip.append(row)
+    for rows in [rows_mag, rows_ip]:
+        # order rows based on PPP connector (and twisted pair), and separate DCBs/hybrids
+        rows = sorted(rows, key=lambda r: (r[0]=='n/a', r[2][:1], int(r[2][1:]),
+                                           twistpair_order(r[3][1:])))
+        rows.insert(0, ['Sensed Flex', 'Sensed 4ASIC-group/DCB power', 'PPP Label', 
+                        'PPP Twisted Pair', 'Sense Line', 'Splitter Input', 'Splitter Output', 
+                        'LVR Con.', 'LVR Number', 'LVR ch.', 'M/S/A', 'Connector on CCTB',
+                        'Measured Voltage', 'Result', 'Comments'])
+        res.append(rows)
+    prof.count('lookups', len(senselines))
+    return res
+
+####### Main Checking Functions
+
+# returns the number of nominal lines that can't be found in the cavern
+# mapping; nominal_lines are parsed here unless given (see batch.py)
+def cavern_typo_check(nominal_lines=None):
+    print(f'\n\nChecking {cavern} for typos...\n\n')
+    if nominal_lines is None:
+        with prof.stage('parse nominal'):
+            nominal_lines = side_nominal_lines(parse_input(nominal))
+    if incremental:
+        with prof.stage('typo check'):
+            cavern_lines, typos = incremental_typo_check(nominal_lines)
+    else:
+        with prof.stage('parse cavern'):
+            cavern_lines = parse_input(cavern) # parse func will do some checks (TODO)
+        with prof.stage('typo check'): typos = typo_keys(nominal_lines, cavern_lines)
+    # now, make sure you can find every line in cavern lines! (but, don't
+    # require the PPP to be the same; this will be checked later)
+    not_found = 0
+    for nom_line in nominal_lines:
+        if nom_line.identity_key() in typos:
+            print(nom_line.x+nom_line.y+nom_line.z+nom_line.bp+
+                  nom_line.bp_con+nom_line.ibbp2b2+nom_line.flex+
+                  nom_line.load+nom_line.msa) # TODO text file in FIXME...
+            not_found += 1
+    return not_found
+
+# identities of the nominal lines that can't be found in the cavern lines
+def typo_keys(nominal_lines, cavern_lines):
+    cavern_index = index_lines(cavern_lines, line.key_minus_ppp)
+    prof.count('lookups', len(nominal_lines))
+    return {nom_line.identity_key() for nom_line in nominal_lines if
+            not nom_line.key_minus_ppp() in cavern_index}
+
+# match the cavern lines to the nominal lines (by everything but the PPP info);
+# returns the list of (cav line, nom line) pairs (also for the stereo<->straight
+# flipped cav lines), the nominal lines that were matched and the messages to
+# print. the matched nominal lines get the LVR info, lengths and labels of
+# their cavern line
+def match_nominal_lines(cavern_lines, nominal_index):
+    keys, messages = pair_nominal_lines(cavern_lines, nominal_index)
+    return label_nominal_lines(cavern_lines, keys, nominal_index) + (messages,)
+
+# the pairing of match_nominal_lines, without touching the nominal lines:
+# returns the nominal index key of each cavern line (None if it has no nominal
+# line), and the messages to print
+def pair_nominal_lines(cavern_lines, nominal_index):
+    keys = []
+    messages = []
+    for cav_line in cavern_lines:
+        nom_line = line('na', 'na', 'na', 'na', 'na', 'na', 'na', 'na', 'na',
+                        'na', 'na')
+        key = cav_line.key_minus_ppp()
+        found = len(nominal_index.get(key, []))
+        if found: nom_line = nominal_index[key][-1]
+        keys.append(key if found else None)
+        if found==0: messages.append(f'Couldn\'t find '+
+                           f'{cav_line.x+cav_line.y+cav_line.z+cav_line.bp}'+
+                           f'{cav_line.bp_con+cav_line.ibbp2b2+cav_line.flex}'+
+                           f'{cav_line.load+cav_line.msa}???')
+        if found>1: messages.append(f'Found more than one '+
+                          f'{cav_line.x+cav_line.y+cav_line.z+cav_line.bp}'+
+                          f'{cav_line.bp_con+cav_line.ibbp2b2+cav_line.flex}'+
+                          f'{cav_line.load+cav_line.msa}???')
+        if not cav_line==nom_line:
+            messages.append(f'\nFound cavern line with wrong PPP! '+
+                  f'{cav_line.x+cav_line.y+cav_line.z+cav_line.bp}'+
+                  f'{cav_line.bp_con+cav_line.ibbp2b2+cav_line.flex}'+
+                  f'{cav_line.load+cav_line.msa}\n')
+        if check_stereo_straight_flip:
+            if not cav_line.flip_stereo_straight_line()==nom_line:
+                messages.append(f'\nFound flipped cavern line with wrong PPP!\n')
+    prof.count('lookups', len(cavern_lines))
+    prof.count('line comparisons', len(cavern_lines)*(1+check_stereo_straight_flip))
+    return keys, messages
+
+# the rest of match_nominal_lines, from the keys of pair_nominal_lines: sets the
+# LVR info, lengths and labels of the matched nominal lines (the ones in
+# nominal_index, so also when the keys were stored by the incremental mode),
+# and returns the pairs, flipped pairs and matched nominal lines
+def label_nominal_lines(cavern_lines, keys, nominal_index):
+    pairs = []
+    pairs_flip = []
+    matched = []
+    for cav_line, key in zip(cavern_lines, keys):
+        nom_line = line('na', 'na', 'na', 'na', 'na', 'na', 'na', 'na', 'na',
+                        'na', 'na')
+        for nl in nominal_index.get(key, []):
+            nl.set_lvr(cav_line.lvr, cav_line.lvr_ch)
+            nl.set_length(cav_line.length_c, cav_line.length_a)
+            cav_ppp_label = cav_line.ppp_label.split(' | ')
+            ppp_label = nl.ppp + ' - ' + nl.ppp_pin + '/' + \
+                        ppp_ret_pin(nl.ppp_pin) + ' | ' + cav_ppp_label[1]
+            nl.set_labels(ppp_label, cav_line.lvr_label)
+            nom_line = nl
+            matched.append(nl)
+        pairs.append((cav_line, nom_line))
+        if check_stereo_straight_flip:
+            pairs_flip.append((cav_line.flip_stereo_straight_line(), nom_line))
+    return pairs, pairs_flip, matched
+
+# check the LVR ch -> load of the cavern lines vs the LV schematics
+# (schem_table, see lvr_load_table) in one join on (Mag/IP, True/Mirror, LVR +
+# src pin): each LVR ch of a cavern line (its lvr_loads) should power the load
+# that the schematic of its mag/IP PEPI has on that ch, and each PEPI type
+# (mag/IP and True/Mirror) of the cavern lines should use all the chs of its
+# schematic. returns the LVR chs that aren't in the schematics (in order) and
+# the rows of errors (see lvr_load_cols): wrong loads and chs depopulated in the
+# schematic in the order of the cavern lines, then the unused schematic chs
+lvr_load_cols = ['Mag/IP', 'True/Mir', 'BP', 'M/S/A', 'LVR + Src Pin',
+                 'Cav. Map. Load', 'LV Schem. Load', 'Problem']
+
+def lvr_load_errors(cavern_lines, schem_table):
+    import pandas
+    cavern_table = pandas.DataFrame(
+        [(l.z, true_mirror(l.x, l.y, l.z), l.bp, l.msa, lvr, load)
+         for l in cavern_lines for lvr, load in l.lvr_loads],
+        columns=['z', 'truemir', 'bp', 'msa', 'lvr', 'load'])
+    prof.count('lookups', len(cavern_table))
+    pepi_types = cavern_table[['z', 'truemir']].drop_duplicates()
+    expected = pepi_types.merge(schem_table, on='z')
+    joined = cavern_table.merge(expected, how='outer', on=['z', 'truemir', 'lvr'],
+                                indicator=True, sort=False)
+    depopulated = joined['_merge'] == 'left_only'
+    unused = joined['_merge'] == 'right_only'
+    joined.loc[depopulated, 'schem_load'] = 'Depopulated in LV Schem.!'
+    joined.loc[unused, ['bp', 'msa', 'load']] = 'n/a', 'n/a', 'Not in Cav. Map.!'
+    joined['problem'] = 'Wrong load'
+    joined.loc[depopulated, 'problem'] = 'Depopulated in LV Schem.'
+    joined.loc[unused, 'problem'] = 'Unused LV Schem. ch'
+    wrong = joined['load'] != joined['schem_load']
+    errors = pandas.concat([joined[wrong & ~unused], joined[unused]])
+    missing = joined.loc[depopulated, 'lvr'].drop_duplicates().tolist()
+    return missing, errors[['z', 'truemir', 'bp', 'msa', 'lvr', 'load',
+                            'schem_load', 'problem']].values.tolist()
+
+# the LVR ch -> load maps of the LV schematics, in one table (z, LVR + src pin,
+# load) for lvr_load_errors
+def lvr_load_table(ip_map_lvr_load, mag_map_lvr_load):
+    import pandas
+    return pandas.DataFrame(
+        [('ip', lvr, load) for lvr, load in ip_map_lvr_load.items()] +
+        [('mag', lvr, load) for lvr, load in mag_map_lvr_load.items()],
+        columns=['z', 'lvr', 'schem_load'])
+
+def schem_lvr_load_table():
+    return lvr_load_table(parse_input(schem_ip), parse_input(schem_mag))
+
+# the LVR ch -> load map of both LV schematics (for the sense check)
+def schem_lvr_load():
+    return {**parse_input(schem_ip), **parse_input(schem_mag)}
+
+# incremental mode: the results for each DCB/hybrid sheet of the cavern mapping
+# are kept in a run store (see run_store.py), and only re-made for the sheets
+# whose content (or whose other inputs, eg. the nominal mapping) changed since
+# the last run; the fixme/ and output/ files are then put together from the
+# stored and the re-made results
+store = None
+sheet_entries = None
+
+# returns the list of (sheet, store entry, cavern lines, splice messages) of
+# the cavern mapping sheets
+def incremental_entries():
+    global store, sheet_entries
+    if sheet_entries is not None: return sheet_entries
+    store = run_store.run_store(cavern)
+    hashes = xls_cache.sheet_hashes(cavern)
+    sheet_entries = []
+    for sheet in cavern_sheets(list(hashes)):
+        entry = store.entry(sheet, hashes[sheet])
+        lines, messages = store.sheet_result(entry, 'lines', tuple(sides),
+                                             lambda: parse_cavern_sheet(cavern, sheet))
+        sheet_entries.append((sheet, entry, lines, messages))
+    store.save(list(hashes))
+    return sheet_entries
+
+# returns the lines of one cavern sheet, and the messages about its splices
+def parse_cavern_sheet(file, sheet):
+    cells = readSheets(file, [sheet])[sheet]
+    if sheet.startswith('DCB'): df = parseDCBs(cells)
+    else: df = parseHybrids(cells)
+    titles = sheetTitles(cells)
+    table, splice_errors = combine_splices(
+        cavern_sheet_table(df, sheet, cavern_sheet_sides(sheet, titles)))
+    return lines_from_table(table), splice_messages(splice_errors)
+
+# incremental_entries, with only the lines of the side being checked
+def side_entries():
+    return [(sheet, entry, [l for l in lines if l.x==side], messages) for
+            sheet, entry, lines, messages in incremental_entries()]
+
+# like parse_cavern, but with the per-sheet lines from the run store
+def incremental_cavern_lines():
+    cavern_lines = []
+    for sheet, entry, lines, messages in incremental_entries():
+        for message in messages: print(message)
+        cavern_lines += lines
+    return cavern_lines
+
+# which sheet a line belongs in; nominal lines are checked for typos against
+# the cavern sheet holding their class only
+def line_class(l):
+    if 'JD' in l.bp_con: return (l.x, l.y, l.z, 'DCB')
+    return (l.x, l.y, l.z, l.flex[:1])
+
+def incremental_typo_check(nominal_lines):
+    entries = incremental_entries()
+    cavern_lines = incremental_cavern_lines()
+    nominal_classes = {}
+    for nom_line in nominal_lines:
+        nominal_classes.setdefault(line_class(nom_line), []).append(nom_line)
+    class_sheets = {}
+    for sheet, entry, lines, messages in entries:
+        for c in dict.fromkeys(line_class(l) for l in lines):
+            class_sheets.setdefault(c, []).append(sheet)
+    deps = xls_cache.file_hash(nominal)
+    typos = set()
+    for sheet, entry, lines, messages in entries:
+        classes = [c for c in class_sheets if class_sheets[c] == [sheet]]
+        sheet_nominal_lines = [nl for c in classes for nl in nominal_classes.get(c, [])]
+        typos |= store.sheet_result(entry, 'typos', (deps, tuple(classes)),
+                    lambda: typo_keys(sheet_nominal_lines, lines))
+    # the classes in no (or more than one) sheet are checked against everything
+    shared_nominal_lines = [nl for c in nominal_classes if
+                            len(class_sheets.get(c, [])) != 1
+                            for nl in nominal_classes[c]]
+    typos |= typo_keys(shared_nominal_lines, cavern_lines)
+    store.save([sheet for sheet, entry, lines, messages in entries])
+    return cavern_lines, typos
+
+# like match_nominal_lines; only the pairing (the nominal index keys, see
+# pair_nominal_lines) and the messages are stored, as stored nominal lines would
+# be copies of the ones in nominal_index. the labelling of the nominal lines is
+# always re-done, on the lines passed in
+def incremental_match(nominal_index):
+    entries = side_entries()
+    deps = (xls_cache.file_hash(nominal), check_stereo_straight_flip)
+    pairs, pairs_flip, matched, messages = [], [], [], []
+    for sheet, entry, lines, splice_msgs in entries:
+        keys, sheet_messages = store.sheet_result(entry, f'match {side}', deps,
+                                   lambda: pair_nominal_lines(lines, nominal_index))
+        res = label_nominal_lines(lines, keys, nominal_index)
+        pairs += res[0]
+        pairs_flip += res[1]
+        matched += res[2]
+        messages += sheet_messages
+    store.save([sheet for sheet, entry, lines, messages in entries])
+    return pairs, pairs_flip, matched, messages
+
+# the CCTB table of each PEPI of the side being checked, re-made only if one
+# of the sheets of the PEPI changed
+def incremental_cctb_tables(pepi_lines):
+    entries = incremental_entries()
+    pepi_rows = {}
+    for yz in pepi_lines:
+        deps = (xls_cache.file_hash(nominal),) + tuple(
+            (sheet, entry['hash']) for sheet, entry, lines, messages in entries
+            if z_truemir_to_y_z(*sheet.split(' - ')[1:3], side) == yz)
+        pepi_rows[yz] = store.store_result(f'cctb {side} {yz}', deps,
+                            lambda: organize_cctb_table(pepi_lines[yz]))
+    store.save([sheet for sheet, entry, lines, messages in entries])
+    return pepi_rows
+
+# parse the inputs shared by the sides, then check and fix each side; with more
+# than one side, the sides are checked in parallel, one worker process per side.
+# the nominal lines and LVR -> load map are parsed here unless given (see
+# batch.py). returns the error counts of each side (see check_fix_side)
+def cavern_check_fix(nominal_lines=None, schem_table=None):
+    print(f'\n\nChecking {nominal} vs {cavern}...\n\n')
+    if nominal_lines is None:
+        with prof.stage('parse nominal'):
+            nominal_lines = side_nominal_lines(parse_input(nominal))
+    with prof.stage('parse cavern'):
+        if incremental: cavern_lines = incremental_cavern_lines()
+        else: cavern_lines = parse_input(cavern)
+    with prof.stage('index nominal'):
+        # index the nominal lines once by everything but the PPP info (the
+        # key includes the side, so one index does for all the sides)
+        nominal_index = index_lines(nominal_lines, line.key_minus_ppp)
+    if check_lines and schem_table is None:
+        with prof.stage('parse schematics'): schem_table = schem_lvr_load_table()
+    inputs = (nominal_index, cavern_lines, schem_table)
+    corrected.clear()
+    # the run store of the incremental mode is shared by the sides, so they're
+    # checked one after the other
+    if incremental or not session.use_pool(len(sides)):
+        return {x: check_fix_side(x, *inputs) for x in sides}
+    errors = {}
+    with concurrent.futures.ProcessPoolExecutor(max_workers=len(sides),
+                                                initializer=share_inputs,
+                                                initargs=(inputs,)) as pool:
+        checks = [pool.submit(check_fix_side_worker, x) for x in sides]
+        for x, check in zip(sides, checks):
+            output, stages, errors[x], corrected[x] = check.result()
+            print(output, end='')
+            prof.merge(stages, f'{x} side: ')
+    return errors
+
+# inputs of check_fix_side shared by the worker processes of the sides (see
+# cavern_check_fix): the nominal index, the cavern lines and the LVR -> load
+# map. they're handed over when the workers start (so not copied again with
+# fork); the matched nominal lines get their LVR info set, but each worker has
+# its own copy
+shared_inputs = None
+
+def share_inputs(inputs):
+    global shared_inputs
+    shared_inputs = inputs
+    session.in_pool = True
+
+# check_fix_side in a worker process; returns the printout (so that the
+# printouts of the sides don't get mixed up), the timed stages, the errors and
+# the corrected lines
+def check_fix_side_worker(x):
+    prof.stages, prof.profiles = {}, {}
+    printout = io.StringIO()
+    with contextlib.redirect_stdout(printout):
+        errors = check_fix_side(x, *shared_inputs)
+    return printout.getvalue(), prof.stages, errors, corrected[x]
+
+# check and fix the cavern lines of side x; returns the number of errors of
+# each kind found (for the batch summary), in the order of check_fix_errors
+check_fix_errors = ['Unmatched Lines', 'Wrong PPP', 'Moved Lines Wrong PPP',
+                    'Swap Table Problems', 'Petr Label Errors', 'LVR-Load Errors']
+
+# the corrected mapping of each side checked by the last cavern_check_fix (eg.
+# for the query service, see query.py): the (cav line, nom line) pairs of all
+# the cavern lines, and of the moved cavern lines (with -swap)
+corrected = {}
+
+def check_fix_side(x, nominal_index, cavern_lines, schem_table):
+    global side
+    side = x
+    error_counts = dict.fromkeys(check_fix_errors, 0)
+    cavern_lines = [l for l in cavern_lines if l.x==x]
+    # from (all) cav line to (cav line, nom line); keyed by the full key so
+    # that lines are only merged if they also have the same LVR/lengths
+    ppp_corrected_cavern_lines = {}
+    # also do comparison with all cavern lines flipped stereo<->straight
+    # note: for this, compare against nominal line matched to non-flipped
+    # cavern line!
+    ppp_corrected_cavern_lines_flip = {}
+    ppp_corrected_cavern_lines_moved = {}
+    with prof.stage('match'):
+        if incremental:
+            pairs, pairs_flip, matched, messages = incremental_match(nominal_index)
+        else:
+            pairs, pairs_flip, matched, messages = \
+                match_nominal_lines(cavern_lines, nominal_index)
+        for message in messages: print(message)
+        for cav_line, nom_line in pairs:
+            ppp_corrected_cavern_lines[cav_line.full_key()] = (cav_line, nom_line)
+        for cav_line_flip, nom_line in pairs_flip:
+            ppp_corrected_cavern_lines_flip[cav_line_flip.full_key()] = \
+                (cav_line_flip, nom_line)
+        # and by PEPI+PPP info (for the moved lines below); only the matched
+        # nominal lines have their labels set
+        nominal_ppp_index = index_lines(dict.fromkeys(matched), line.key_pepi_ppp)
+        error_counts['Unmatched Lines'] = sum(1 for cl, nl in pairs if nl.x=='na')
+        error_counts['Wrong PPP'] = sum(1 for cl, nl in pairs if
+                                        nl.x!='na' and not cl==nl)
+
+    # also, if the user is specifying where the positronic are being swapped
+    # to, want to figure out where shifters should move the LVR/PPP labels
+    # (so that, with the pre-moved positronics taken into account, the
+    # cables going into the given PPP location are the correct lines/LVRs)
+    if swap_pos != 'NA':
+        with prof.stage('swap'):
+            # the swap table is only read once per run (see parse_input), and
+            # the lines are looked up by PEPI and Positronic
+            swap_rows = parse_input(swap_pos)
+            positronic_index = index_positronics(cavern_lines)
+            swaps, swap_problems, swap_cycles = validate_swaps(swap_rows,
+                                                               positronic_index)
+            for sheet, row, pepi, pos, to, problem in swap_problems:
+                move = ' -> '.join('?' if n is None else f'P{n}' for n in (pos, to))
+                print(f'Swap problem?? {sheet} row {row} ({pepi}): {move}: {problem}')
+            for sheet, row, pepi, cycle in swap_cycles:
+                print(f'Swap cycle (needs a free slot): {sheet} row {row} ({pepi}): {cycle}')
+            write_csv(fixme_file('swap_problems.csv'),
+                      [['Sheet', 'Row', 'PEPI', 'Positronic', 'Swap to',
+                        'Problem']] + swap_problems)
+            error_counts['Swap Table Problems'] = len(swap_problems)
+            moved_cavern_lines = apply_swaps(swap_rows, swaps, positronic_index)
+            for cav_line in moved_cavern_lines:
+                # should have already checked above (with print statements) that
+                # a unique nom_line is found for each cav_line, but need to recreate
+                # the map from cavern lines to nominal lines because of changed PPP
+                # Note that labels for nominal lines are already set above!
+                nom_line = line('na', 'na', 'na', 'na', 'na', 'na', 'na', 'na', 'na',
+                                'na', 'na')
+                found = 0
+                for nl in nominal_ppp_index.get(cav_line.key_pepi_ppp(), []):
+                    found += 1
+                    nom_line = nl
+                if found==0: print(f'Couldn\'t find nominal line at '+
+                                   f'{cav_line.x+cav_line.y+cav_line.z}'+
+                                   f'{cav_line.ppp+cav_line.ppp_pin}???')
+                if found>1: print(f'Found more than one nominal line at '+
+                                  f'{cav_line.x+cav_line.y+cav_line.z}'+
+                                  f'{cav_line.ppp+cav_line.ppp_pin}???')
+                if not cav_line==nom_line:
+                    error_counts['Moved Lines Wrong PPP'] += 1
+                    print(f'\nFound (moved) cavern line with wrong PPP! '+
+                          f'{cav_line.x+cav_line.y+cav_line.z+cav_line.bp}'+
+                          f'{cav_line.bp_con+cav_line.ibbp2b2+cav_line.flex}'+
+                          f'{cav_line.load+cav_line.msa}\n')
+                ppp_corrected_cavern_lines_moved[cav_line.full_key()] = \
+                    (cav_line, nom_line)
+
+    # write out all cavern lines
+    # TODO should put this in a separate function...
+    # print_ppp_corrected_cavern_lines('fixme/cavern_mapping_ppp_fixes.xlsx',
+    #                                  ppp_corrected_cavern_lines)
+    with prof.stage('ppp_fixes.csv'):
+        fixes_rows = ppp_fixes_rows(ppp_corrected_cavern_lines.values())
+        write_ppp_table(fixme_file('ppp_fixes.csv'), ppp_fixes_cols, fixes_rows,
+                        'Surf. Map. PPP Pos.', 'Surf. Map. PPP Pins',
+                        'SBC Flex Name', ppp_fixes_pop_cols)
+    if fixme_xlsx:
+        with prof.stage('cavern_mapping_ppp_fixes.xlsx'):
+            write_xlsx(fixme_file('cavern_mapping_ppp_fixes.xlsx'),
+                       {sheet: ppp_table_rows(ppp_fixes_cols, rows,
+                                              'Surf. Map. PPP Pos.',
+                                              'Surf. Map. PPP Pins',
+                                              'SBC Flex Name', ppp_fixes_pop_cols)
+                        for sheet, rows in split_rows_pepi(ppp_fixes_cols,
+                                                     fixes_rows).items()})
+
+    # write out all flipped cavern lines
+    if check_stereo_straight_flip:
+        with prof.stage('ppp_fixes_flipped.csv'):
+            write_ppp_table(fixme_file('ppp_fixes_flipped.csv'), ppp_fixes_cols,
+                            ppp_fixes_rows(ppp_corrected_cavern_lines_flip.values()),
+                            'Surf. Map. PPP Pos.', 'Surf. Map. PPP Pins',
+                            'SBC Flex Name', ppp_fixes_pop_cols)
+
+    # write out where labels should move to
+    if swap_pos != 'NA':
+        with prof.stage('move_labels.csv'):
+            # keep a few extra columns (mostly just for sorting)
+            # also keep track of actual cable lengths, not just required!
+            moved_cols = ['True/Mir', 'Mag/IP', 'BP', 'BP Con.',
+                          'iBB/P2B2 Con.', 'SBC Flex Name',
+                          '4-asic group / DCB power', 'M/S/A',
+                          'PPP Pos. (Correct)', 'PPP Pins (Correct)',
+                          'LVR', 'LVR Ch.', 'Actual C L (m)',
+                          'Actual A L (m)', 'C Len (m)', 'A Len (m)',
+                          'Cav. Map. PPP Label (After Moving Pos.)',
+                          'Replace w/ PPP Label',
+                          'Cav. Map. LVR Label (After Moving Pos.)',
+                          'Replace w/ LVR Label']
+            moved_rows = []
+            for cl, nl in ppp_corrected_cavern_lines_moved.values():
+                if nl.x=='na':
+                    # no nominal line where this one was moved to: the cable
+                    # shouldn't be there, so only its own info
+                    moved_rows.append([true_mirror(cl.x, cl.y, cl.z), cl.z, cl.bp,
+                                       cl.bp_con, cl.ibbp2b2, cl.flex, cl.load,
+                                       cl.msa, cl.ppp, cl.ppp_pin + ',' +
+                                       ppp_ret_pin(cl.ppp_pin), cl.lvr, cl.lvr_ch,
+                                       cl.length_c, cl.length_a, 'n/a', 'n/a',
+                                       cl.ppp_label, 'No nominal line here',
+                                       cl.lvr_label, 'No nominal line here'])
+                    continue
+                moved_rows.append([true_mirror(nl.x, nl.y, nl.z), nl.z, nl.bp,
+                                   nl.bp_con, nl.ibbp2b2, nl.flex, nl.load,
+                                   nl.msa, nl.ppp, nl.ppp_pin + ',' +
+                                   ppp_ret_pin(nl.ppp_pin), nl.lvr, nl.lvr_ch,
+                                   cl.length_c, cl.length_a, nl.length_c,
+                                   nl.length_a, cl.ppp_label, nl.ppp_label,
+                                   cl.lvr_label, nl.lvr_label])
+            write_ppp_table(fixme_file('move_labels.csv'), moved_cols, moved_rows,
+                            'PPP Pos. (Correct)', 'PPP Pins (Correct)',
+                            'SBC Flex Name')
+        if fixme_xlsx:
+            with prof.stage('shifters_move_labels.xlsx'):
+                write_xlsx(fixme_file('shifters_move_labels.xlsx'),
+                           {sheet: ppp_table_rows(moved_cols, rows,
+                                                  'PPP Pos. (Correct)',
+                                                  'PPP Pins (Correct)',
+                                                  'SBC Flex Name')
+                            for sheet, rows in split_rows_pepi(moved_cols,
+                                                         moved_rows).items()})
+
+    # TODO comparison to LVR testing sheet. can skip Petr's PPP sorted sheet
+    compare_petr = [comp for comp in compare if not
+                    (comp in ['compare/lvr_testing.csv', 'compare/CBM_PPP_new.txt']
+                     or 'alex' in comp) and petr_filename_to_xyz(comp)[0]==x]
+    if compare_petr:
+        with prof.stage('Petr comparison'):
+            # For Petr comparison, he separates spliced lines into different
+            # entries, so index the "unspliced" lines
+            split_index = index_split_lines(nl for cl, nl in
+                                            ppp_corrected_cavern_lines.values())
+            # the actual checking will occur inside the respective parsing
+            # functions (one worker process per file, if there's more than
+            # one); any errors are printed here, and collected in one report
+            petr_errors = [['Petr File', 'Cavern Section', 'LVR', 'LVR Ch.',
+                            'Problem', 'Petr', 'Me']]
+            if session.use_pool(len(compare_petr)):
+                with concurrent.futures.ProcessPoolExecutor() as pool:
+                    checks = [pool.submit(parse_func[comp], comp, split_index)
+                              for comp in compare_petr]
+                    results = [check.result() for check in checks]
+            else:
+                results = [parse_func[comp](comp, split_index) for comp in compare_petr]
+            for comp, res in zip(compare_petr, results):
+                print(f'\n\nChecking {nominal} vs {comp}...\n\n')
+                if res is None: continue # nothing checked
+                messages, report = res
+                for message in messages: print(message)
+                petr_errors += report
+            write_csv(fixme_file('petr_lvr_label_errors.csv'), petr_errors)
+            error_counts['Petr Label Errors'] = len(petr_errors)-1
+            prof.count('rows written', len(petr_errors))
+
+
+    # print(f'\n\nWriting (unformatted) fixed cavern mapping...\n\n')
+    # fixed = 'fixed-'+cavern
+
+    if check_lines:
+        print(f'\n\nChecking {cavern} LVR<->load vs {schem_ip} and {schem_mag}...\n\n')
+        with prof.stage('LVR-load check'):
+            # cavern_lines is what you want to compare
+            # store erroroneous cav map/lvr schem line info, lvr info
+            map_errors = [lvr_load_cols]
+            # join the cavern_lines (including both lvrs for splices) with the
+            # schematics, and check that lvr is mapping to the right load!
+            missing, errors = lvr_load_errors(cavern_lines, schem_table)
+            for lvr in missing: print(f'Cannot find {lvr}!')
+            map_errors += errors
+            error_counts['LVR-Load Errors'] = len(errors)
+            fixme_map = open(fixme_file('lvr_load_mapping_errors.csv'), 'w')
+            writer_map = csv.writer(fixme_map)
+            for row in map_errors: writer_map.writerow(row)
+            fixme_map.close()
+            prof.count('rows written', len(map_errors))
+        if fixme_xlsx:
+            with prof.stage('lvr_load_mapping_errors.xlsx'):
+                write_xlsx(fixme_file('lvr_load_mapping_errors.xlsx'),
+                           {sheet: [map_errors[0]] + rows for sheet, rows in
+                            split_rows_pepi(map_errors[0], map_errors[1:]).items()})
+
+    # go through ppp_corrected_cavern_lines.value() and print the
+    # columns Federico wants to a list; organize into different sheets for
+    # each PEPI, then organize by BPs (gamma, beta, then alpha), then organize
+    # DCBs then hybrids (straight then stereo), then order positronics small to
+    # large
+    # the sides that aren't checked get the tables of the comparable PEPIs of
+    # the first side that is, so only organize each PEPI of this side once
+    with prof.stage('CCTB tables'):
+        corrected_lines = [nl for cl, nl in ppp_corrected_cavern_lines.values()]
+        pepi_lines = partition_lines_pepi(corrected_lines)
+        pepi_rows = {}
+        if incremental: pepi_rows = incremental_cctb_tables(pepi_lines)
+        cctb_tables = {}
+        for cctb_x in ['C', 'A']:
+            if not (cctb_x==x or (x==sides[0] and not cctb_x in sides)): continue
+            for y in ['top', 'bot']:
+                for z in ['ip', 'mag']:
+                    truemir = true_mirror(cctb_x,y,z)
+                    yz = z_truemir_to_y_z(z, truemir, x)
+                    if not yz in pepi_rows:
+                        pepi_rows[yz] = organize_cctb_table(pepi_lines.get(yz, []))
+                    print(f'\nPrinting CCTB {cctb_x}-{y}-{z} power table...\n')
+                    cctb_tables[output_file(f'{cctb_x}_{y}_{z}_{truemir}_LVpower_cctb.csv')] = \
+                        pepi_rows[yz]
+        write_csvs(cctb_tables)
+    corrected[x] = (list(ppp_corrected_cavern_lines.values()),
+                    list(ppp_corrected_cavern_lines_moved.values()))
+    return error_counts
+
+def cavern_sense_check():
+    with prof.stage('parse schematics'):
+        map_lvr_load = schem_lvr_load()
+        tbb_map = parse_input(tbb_schem)
+    # print(tbb_map)
+    with prof.stage('parse sense layout'):
+        senselines = parse_func[cavern_sense](cavern_sense, map_lvr_load)
+    with prof.stage('parse cavern'):
+        # the sense layout is the same on both sides (the tables only depend on
+        # True/Mirror), so the power lines of one side will do
+        power_lines_ref = [l for l in parse_input(cavern) if l.x==sides[0]]
+    with prof.stage('tBB check'):
+        # for each sense line, check that the line the tBB claims is being sensed is
+        # indeed the power line in Phoebe's map for the associated channel
+        for sl in senselines:
+            tbb_line = f'{sl.tbb_con}_{sl.in_twistpair}'
+            bp = ((sl.in_label).split('_'))[0]
+            if not tbb_line in tbb_map:
+                print('\n\n!!! Couldnt find tBB {tbb_line}...\n\n')
+                continue
+            lvr_line = f'{sl.lvr}_{lvr_ch_to_pin(lvr_twistpair_to_ch(sl.lvr_con, sl.lvr_twistpair))}'
+            if not lvr_line in map_lvr_load:
+                print('\n\n!!! Couldnt find LVR {lvr_line}...\n\n')
+                continue
+            # print(f'My map+tBB: {bp}_{tbb_map[tbb_line]}, Phoebe power map: {map_lvr_load[lvr_line]}')
+            lvr_load = load_label_phoebe_to_me(map_lvr_load[lvr_line])
+            sense_load = f'{bp}_{tbb_map[tbb_line]}'
+            if not lvr_load==sense_load:
+                print(f'\nOn {lvr_line}, (Power Map) {lvr_load} != (Sense) {sense_load}')
+        prof.count('lookups', 2*len(senselines))
+    with prof.stage('sense tables'):
+        # the sense tables only depend on True/Mirror
+        power_index = index_power_lines_sense(power_lines_ref)
+        match_errors = [['Mag/IP', 'True/Mir', 'LVR', 'LVR ch.', 'Power Lines Found']]
+        sense_tables = {}
+        for truemir in ['True', 'Mirror']:
+            sense_tables[truemir] = organize_cctb_sense_table(senselines, truemir,
+                                                              power_index, match_errors)
+        if len(match_errors) > 1:
+            print(f'\n{len(match_errors)-1} sense lines without a (unique) corresponding '+
+                  f'power line; see {fixme_file("sense_power_match_errors.csv")}\n')
+        fixme_match = open(fixme_file('sense_power_match_errors.csv'), 'w')
+        writer_match = csv.writer(fixme_match)
+        for row in match_errors: writer_match.writerow(row)
+        fixme_match.close()
+        prof.count('rows written', len(match_errors))
+    with prof.stage('CCTB tables'):
+        cctb_tables = {}
+        for x in ['C', 'A']:
+            for y in ['top', 'bot']:
+                for z in ['ip', 'mag']:
+                    truemir = true_mirror(x,y,z)
+                    print(f'\nPrinting CCTB {x}-{y}-{z} sense table...\n')
+                    cctb_rows = sense_tables[truemir]
+                    if z=='mag': cctb_rows = cctb_rows[0]
+                    elif z=='ip': cctb_rows = cctb_rows[1]
+                    else: print('...')
+                    cctb_tables[output_file(f'{x}_{y}_{z}_{truemir}_LVsense_cctb.csv')] = cctb_rows
+        write_csvs(cctb_tables)
+
+### grab command line args, then run the checks
+def main(argv=None):
+    global nominal, cavern, compare, check_lines, cavern_sense, swap_pos, incremental
+    global fixme_xlsx, sides
+    parser = ArgumentParser(description='Check and fix cavern mapping')
+    # designate nominal and cavern mappings
+    parser.add_argument('nominal', help='specify nominal mapping to be used as input')
+    parser.add_argument('cavern', help='specify cavern mapping to be used as input')
+    # note that Petr's sheets are for the C side only
+    # also set sheets that will be compared for consistency
+    parser.add_argument('doCompare', help='specify if compare mappings should be checked')
+    parser.add_argument('doCheckLines', help='specify if cavern mapping LVR-load should be checked')
+    parser.add_argument('-sense', '-c', default='NA', help='specify cavern sense mapping to be checked')
+    parser.add_argument('-swap', '-s', default='NA', help='specify how Posistronix are swapping')
+    parser.add_argument('-incremental', '-i', action='store_true', help='only re-check the cavern sheets that changed since the last run')
+    parser.add_argument('-side', nargs='+', choices=['C', 'A'], default=['C'], help='specify the sides to check (C and/or A); each side is checked in its own process')
+    parser.add_argument('-xlsx', action='store_true', help='also write the fixme reports as xlsx (one sheet per PEPI) for the shifters')
+    parser.add_argument('-profile', '--profile', nargs='?', const='profile.json', default=None, help='time each stage, writing the timings and counters to this JSON file')
+    parser.add_argument('-cprofile', '--cprofile', default=None, help='with -profile, also write a cProfile dump per stage to this directory')
+    args = parser.parse_args(argv)
+    if args.cprofile is not None and args.profile is None: args.profile = 'profile.json'
+    if args.profile is not None: prof.start(args.cprofile)
+    nominal = args.nominal
+    cavern = args.cavern
+    compare = []
+    if (args.doCompare).lower()=='true':
+        compare = os.listdir('compare')
+        compare = ['compare/'+file for file in compare]
+    check_lines = (args.doCheckLines).lower()=='true'
+    cavern_sense = args.sense
+    swap_pos = args.swap
+    incremental = args.incremental
+    fixme_xlsx = args.xlsx
+    sides = list(dict.fromkeys(args.side))
+    session.clear() # the checks change the parsed lines, so start from scratch
+    set_parse_funcs([nominal, cavern, swap_pos, schem_ip, schem_mag, cavern_sense,
+                     tbb_schem] + compare)
+
+    if cavern_sense == 'NA':
+        if cavern_typo_check()==0: cavern_check_fix()
+    else:
+        cavern_sense_check()
+    if store is not None:
+        print(f'\nRe-used {store.reused} and re-made {store.made} per-sheet results '+
+              f'(run store {store.path})')
+    if args.profile is not None:
+        command = sys.argv[1:] if argv is None else list(argv)
+        prof.write(args.profile, ['check_mappings.py'] + command)
+
+if __name__ == '__main__':
+    main()
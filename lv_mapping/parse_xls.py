@@ -0,0 +1,145 @@
+"""
+Parse the input cavern mapping
+"""
+import sys
+import warnings # pandas FutureWarnings are annoying...
+from argparse import ArgumentParser
+from .cavern_xls import parseWorkbook
+from .profiling import prof # stage timers/counters for -profile
+
+### global variables in script
+dfDCBs = {}
+dfHybrids = {}
+
+pepiType = {}
+pepiType['IP/CB'] = 'True'
+pepiType['IP/CT'] = 'Mirror'
+pepiType['Mag/CB'] = 'Mirror'
+pepiType['Mag/CT'] = 'True'
+pepiType['IP/AB'] = 'Mirror'
+pepiType['IP/AT'] = 'True'
+pepiType['Mag/AB'] = 'True'
+pepiType['Mag/AT'] = 'Mirror'
+
+#
+# Uses the global maps which is not ideal...
+#
+def merge( dcb, hybridX, hybridS ):
+    print( "Merging...", dcb, hybridX, hybridS )
+    # annoying excel sheet name problem...
+    # 'Hybrid - Mag - Mirror - Straight' is actually called
+    # 'Hybrid - Mag - Mirror - Straigh'
+    if (hybridX == 'Hybrid - Mag - Mirror - Straight'): hybridX = 'Hybrid - Mag - Mirror - Straigh'
+    dfMergeHybrid = dfHybrids[hybridX]
+    dfMergeHybrid = dfMergeHybrid.append( dfHybrids[hybridS] )
+    dfMergeHybrid['Pos'] = dfMergeHybrid['BP Connector'].str.replace( 'JP', '' ).astype(int)
+    dfMergeHybrid = dfMergeHybrid.sort_values( by=['Pos', '4-asic group' ] )#, 'LVR Name'] )
+    cols = list(dfMergeHybrid.columns)
+    cols[cols.index('4-asic group')] = '4-asic group / DCB power'
+    dfMergeHybrid.columns = cols
+    del dfMergeHybrid['Pos']
+    dfOut = dfDCBs[dcb][['LVR Name', 'PPP Name', 'BP Connector', 'iBB/P2B2 Connector', 'SBC FLEX NAME', 'Voltage', 'M/S/A', 'PPP Positronic', 'PPP Src/Ret', 'LVR ID', 'LVR Channel' ]]
+    cols = list(dfOut.columns)
+    cols[cols.index('Voltage')] = '4-asic group / DCB power'
+    dfOut.columns = cols
+    dfOut = dfOut.append( dfMergeHybrid[['LVR Name', 'PPP Name', 'BP Connector', 'iBB/P2B2 Connector', 'SBC FLEX NAME', '4-asic group / DCB power', 'M/S/A', 'PPP Positronic', 'PPP Src/Ret', 'LVR ID', 'LVR Channel' ]] )
+    dfOut['LVR Crate'] = 'TBD'
+    return dfOut
+
+def mergePEPI( pepi ):
+    ds = pepi.split('/')
+    station = ds[0]
+    quadrant = ds[1]
+    type = pepiType[pepi]
+    dcb = 'DCB - ' + station + ' - ' + type
+    hybridX = 'Hybrid - ' + station + ' - ' + type + ' - Straight'
+    hybridS = 'Hybrid - ' + station + ' - ' + type + ' - Stereo'
+    print( 'Merging: ' + pepi, dcb, hybridX, hybridS )
+    return merge( dcb, hybridX, hybridS )
+
+def format_columns(writer, hide ):
+    cell_format = writer.book.add_format()
+    cell_format.set_align('center')
+    cell_format.set_align('vcenter')
+    for name in writer.sheets:
+        worksheet = writer.sheets[name]
+        ## centre cells
+        worksheet.set_column( "A:B", 34, cell_format, {'hidden':hide} )
+        worksheet.set_column( "C:C", 14, cell_format )
+        worksheet.set_column( "D:D", 20, cell_format )
+        worksheet.set_column( "E:E", 14, cell_format )
+        worksheet.set_column( "F:F", 25, cell_format )
+        worksheet.set_column( "G:G", 8, cell_format )
+        worksheet.set_column( "H:I", 15, cell_format )
+        worksheet.set_column( "J:J", 8, cell_format )
+        worksheet.set_column( "K:K", 14, cell_format )
+
+    return writer
+
+#
+# Parse the cavern mapping given on the command line (argv) and write the
+# software-readable mappings to output/
+#
+def main( argv=None ):
+    # pandas is only imported when there's something to write
+    import pandas
+    warnings.simplefilter(action='ignore', category=FutureWarning)
+    # pandas.set_option('max_rows', 2000 ) # deprecated
+    pandas.set_option("expand_frame_repr", False)
+    ## suppresses the following warning:
+    ## A value is trying to be set on a copy of a slice from a DataFrame.
+    pandas.options.mode.chained_assignment = None
+
+    ### grab command line args
+    parser = ArgumentParser(description='Produce computer-readable cavern mappings')
+    parser.add_argument('mapping', help='specify cavern mapping to be used as input')
+    parser.add_argument('-profile', '--profile', nargs='?', const='profile.json', default=None, help='time each stage, writing the timings and counters to this JSON file')
+    parser.add_argument('-cprofile', '--cprofile', default=None, help='with -profile, also write a cProfile dump per stage to this directory')
+    args = parser.parse_args( argv )
+    if args.cprofile is not None and args.profile is None: args.profile = 'profile.json'
+    if args.profile is not None: prof.start( args.cprofile )
+
+    # set input mapping file
+    fileIn = args.mapping
+
+    # (shared with check_mappings if run in the same process)
+    with prof.stage( 'parse workbook' ):
+        parsedDCBs, parsedHybrids = parseWorkbook( fileIn )
+        for dcb in parsedDCBs:
+            print( dcb )
+            dfDCBs[dcb] = parsedDCBs[dcb]
+            prof.count( 'rows parsed', len( parsedDCBs[dcb] ) )
+        for hybrid in parsedHybrids:
+            print( hybrid )
+            dfHybrids[hybrid] = parsedHybrids[hybrid]
+            prof.count( 'rows parsed', len( parsedHybrids[hybrid] ) )
+
+    ## merge files and write output
+
+    # TODO: should edit directory structure so that these files get saved to an "output" folder
+    writerC = pandas.ExcelWriter('output/Cavern_LV_Mapping_MT_Formatting_C_side.xlsx', engine='xlsxwriter')
+    writerA = pandas.ExcelWriter('output/Cavern_LV_Mapping_MT_Formatting_A_side.xlsx', engine='xlsxwriter')
+
+    #dfPEPI = {}
+    for pepi in sorted(pepiType):
+        with prof.stage( 'merge' ): dfPEPI = mergePEPI( pepi )
+        with prof.stage( 'write sheets' ):
+            for backplane in [ 'alpha', 'beta', 'gamma' ]:
+                dfBP = dfPEPI[dfPEPI['LVR Name'].str.contains(backplane)]
+                if pepi.find( '/C') > -1:
+                    dfBP.to_excel( writerC, sheet_name=pepi.replace( "/", '-' ) + '-' + backplane, index=False )
+                elif pepi.find( '/A') > -1:
+                    dfBP.to_excel( writerA, sheet_name=pepi.replace( "/", '-' ) + '-' + backplane, index=False )
+                prof.count( 'rows written', len( dfBP ) )
+
+    with prof.stage( 'save workbooks' ):
+        writerC = format_columns( writerC, False )
+        writerC.save()
+        writerA = format_columns( writerA, False )
+        writerA.save()
+    if args.profile is not None:
+        command = sys.argv[1:] if argv is None else list( argv )
+        prof.write( args.profile, ['parseXls.py'] + command )
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+# Per-stage timers and counters for the -profile option of check_mappings and
+# parseXls. The checks wrap each of their stages in prof.stage(name) and count
+# what they do (rows parsed, lookups, splices resolved, rows written, ...) with
+# prof.count(counter, n), which both do nothing unless profiling was started.
+# A stage that is run more than once (eg. parsing the nominal mapping for the
+# typo check and again for check_fix) is summed over its calls. The summary is
+# written as JSON, and with a cProfile directory, each stage also gets its own
+# cProfile dump (<dir>/<stage>.prof, for pstats/snakeviz).
+
+import os, re, json, time, datetime, contextlib
+
+class profiler:
+
+    def __init__(self):
+        self.enabled = False
+        self.cprofile_dir = None
+        self.stages = {} # name -> {'seconds':, 'calls':, 'counters': {}}
+        self.current = None # name of the running stage
+        self.profiles = {} # name -> cProfile.Profile, summed over calls
+        self.start_time = 0
+
+    def start(self, cprofile_dir=None):
+        self.enabled = True
+        self.cprofile_dir = cprofile_dir
+        self.start_time = time.perf_counter()
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        # stages don't nest; anything run inside a stage is part of it
+        if not self.enabled or self.current is not None:
+            yield
+            return
+        entry = self.stages.setdefault(name, {'seconds': 0, 'calls': 0,
+                                              'counters': {}})
+        profile = None
+        if self.cprofile_dir is not None:
+            import cProfile
+            profile = self.profiles.setdefault(name, cProfile.Profile())
+        self.current = name
+        start = time.perf_counter()
+        if profile is not None: profile.enable()
+        try: yield
+        finally:
+            if profile is not None: profile.disable()
+            entry['seconds'] += time.perf_counter() - start
+            entry['calls'] += 1
+            self.current = None
+
+    # counts outside of any stage go to the '(other)' stage
+    def count(self, counter, n=1):
+        if not self.enabled: return
+        entry = self.stages.setdefault(self.current or '(other)',
+                                       {'seconds': 0, 'calls': 0, 'counters': {}})
+        entry['counters'][counter] = entry['counters'].get(counter, 0) + n
+
+    # add the stages timed in another process (eg. a worker checking one side),
+    # with their names prefixed
+    def merge(self, stages, prefix=''):
+        if not self.enabled: return
+        for name, entry in stages.items():
+            own = self.stages.setdefault(prefix+name, {'seconds': 0, 'calls': 0,
+                                                       'counters': {}})
+            own['seconds'] += entry['seconds']
+            own['calls'] += entry['calls']
+            for counter, n in entry['counters'].items():
+                own['counters'][counter] = own['counters'].get(counter, 0) + n
+
+    # print the summary, and write it (and the cProfile dumps)
+    def write(self, file, command):
+        if not self.enabled: return
+        total = time.perf_counter() - self.start_time
+        summary = {'command': command,
+                   'date': datetime.datetime.now().isoformat(timespec='seconds'),
+                   'total seconds': total,
+                   'stages': [{'name': name, **entry} for name, entry in
+                              self.stages.items()]}
+        print(f'\nProfile ({total:.3f} s total):')
+        for name, entry in self.stages.items():
+            counters = ', '.join(f'{counter} {n}' for counter, n in
+                                 entry['counters'].items())
+            print(f'  {name:32} {entry["seconds"]:8.3f} s  {counters}'.rstrip())
+        with open(file, 'w') as f: json.dump(summary, f, indent=2)
+        print(f'Wrote {file}')
+        if self.cprofile_dir is not None:
+            os.makedirs(self.cprofile_dir, exist_ok=True)
+            for name, profile in self.profiles.items():
+                dump = re.sub(r'[^\w.-]+', '_', name) + '.prof'
+                profile.dump_stats(os.path.join(self.cprofile_dir, dump))
+            print(f'Wrote the cProfile dumps to {self.cprofile_dir}')
+
+# shared by all the modules of a run
+prof = profiler()
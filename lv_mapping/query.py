@@ -0,0 +1,320 @@
+# Local query service for the shifters fixing the cables in the cavern: runs
+# the checks once (like check_mappings, reports included), keeps the corrected
+# mapping in memory, indexed by PPP positronic/pin, LVR/ch, BP connector, load
+# and label, and answers HTTP GET queries with JSON, eg.
+#   /ppp?pepi=C-bot-mag&pos=P22&pin=4   which line (LVR ch) is on P22 pin 4
+#   /ppp?pepi=C-bot-mag&pos=P20-P24     all the lines on P20 to P24
+#   /lvr?lvr=22&ch=3                    the lines of LVR 22 ch 3 (any PEPI)
+#   /bp?pepi=C-bot-mag&bp=alpha&con=JP0 the lines of a BP connector (prefix)
+#   /load?load=P1W                      the lines powering a load
+#   /label?text=P3 - 1/9                where a label goes (prefix=1 for a
+#                                       prefix search)
+#   /status                             what's loaded, and when
+# Positions are the corrected ones; add as=cavern to /ppp to look up where a
+# line is in the cavern mapping (after the -swap moves) instead. Each line
+# comes with its cavern mapping position and labels, so /label also answers
+# "this label is on P3, what should replace it". The inputs are polled, and
+# the mapping is reloaded (in the background, still answering from the old
+# one meanwhile) when any of them changes. The printout of the checks goes to
+# fixme/query_service.log.
+#
+# python -m lv_mapping serve <nominal> <cavern> (-swap <swap>) (-compare)
+#     (-lines) (-side C A) (-host 127.0.0.1) (-port 8765) (-poll 2)
+
+import os, re, io, json, math, time, bisect, datetime, threading, contextlib
+import urllib.parse
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from argparse import ArgumentParser
+from . import session
+from . import check_mappings as cm
+
+# keys (tuples) -> records, for point lookups (dict) and range lookups (sorted
+# keys); the values at each position of the keys must be comparable (all ints
+# or all strs)
+class key_index:
+
+    def __init__(self, items):
+        self.map = {}
+        for key, record in items: self.map.setdefault(key, []).append(record)
+        self.keys = sorted(self.map)
+
+    def get(self, key):
+        return self.map.get(key, [])
+
+    # records of the keys from lo to hi (included); a key that is a prefix of
+    # hi is before it, so end hi with math.inf to include all of them
+    def range(self, lo, hi):
+        i = bisect.bisect_left(self.keys, lo)
+        j = bisect.bisect_right(self.keys, hi)
+        return [record for key in self.keys[i:j] for record in self.map[key]]
+
+    # records of the keys starting with the str prefix (after the other
+    # positions given)
+    def prefix(self, key, prefix):
+        return self.range(key + (prefix,), key + (prefix + '\uffff',))
+
+def to_int(value):
+    try: return int(float(value))
+    except ValueError: return None
+
+# labels are compared without case and with any run of spaces as one space
+def norm_label(label):
+    return ' '.join(str(label).split()).lower()
+
+# the JSON record of a corrected line (the nominal line matched to the
+# cavern line); the cavern lines that aren't in the nominal mapping are kept
+# as they are
+def line_record(cl, nl, moved):
+    matched = nl.x!='na'
+    l = nl if matched else cl
+    return {'side': l.x, 'pepi': f'{l.y}-{l.z}',
+            'true/mir': cm.true_mirror(l.x, l.y, l.z), 'bp': l.bp,
+            'bp_con': l.bp_con, 'ibbp2b2': l.ibbp2b2, 'flex': l.flex,
+            'load': l.load, 'msa': l.msa, 'ppp': l.ppp,
+            'ppp_pins': l.ppp_pin + ',' + cm.ppp_ret_pin(l.ppp_pin),
+            'lvr': l.lvr, 'lvr_ch': l.lvr_ch, 'length_c': l.length_c,
+            'length_a': l.length_a, 'ppp_label': l.ppp_label,
+            'lvr_label': l.lvr_label, 'cavern_ppp': cl.ppp,
+            'cavern_ppp_pin': cl.ppp_pin, 'cavern_ppp_label': cl.ppp_label,
+            'cavern_lvr_label': cl.lvr_label, 'matched': matched,
+            'wrong_ppp': matched and not cl==nl, 'moved': moved}
+
+# the indexes of the corrected mapping (see cm.corrected)
+class mapping:
+
+    def __init__(self, corrected):
+        self.records = []
+        for x in corrected:
+            pairs, moved_pairs = corrected[x]
+            self.records += [line_record(cl, nl, False) for cl, nl in pairs]
+            self.records += [line_record(cl, nl, True) for cl, nl in moved_pairs]
+        self.pepis = sorted({(r['side'],) + tuple(r['pepi'].split('-'))
+                             for r in self.records})
+        self.ppp = key_index(self.ppp_keys('ppp', 'ppp_pins'))
+        self.ppp_cavern = key_index(self.ppp_keys('cavern_ppp', 'cavern_ppp_pin'))
+        self.lvr = key_index(self.lvr_keys())
+        self.bp = key_index((self.pepi_key(r) + (r['bp'], r['bp_con']), r)
+                            for r in self.records)
+        self.load = key_index((self.pepi_key(r) + (r['load'],), r)
+                              for r in self.records)
+        self.label = key_index(self.label_keys())
+
+    def pepi_key(self, r):
+        return (r['side'],) + tuple(r['pepi'].split('-'))
+
+    # (side, y, z, positronic #, pin); the lines that aren't on a positronic
+    # ('n/a', ...) are left out
+    def ppp_keys(self, pos_col, pin_col):
+        for r in self.records:
+            pos, pin = to_int(r[pos_col].lstrip('P')), to_int(r[pin_col].split(',')[0])
+            if pos is not None and pin is not None:
+                yield self.pepi_key(r) + (pos, pin), r
+
+    # (side, y, z, LVR, ch), for each ch of the Y spliced lines
+    def lvr_keys(self):
+        for r in self.records:
+            lvr = to_int(r['lvr'])
+            if lvr is None or lvr < 0: continue
+            for ch in r['lvr_ch'].split(' Y '):
+                if to_int(ch) is not None:
+                    yield self.pepi_key(r) + (lvr, to_int(ch)), r
+
+    # the corrected and cavern mapping labels, whole and (for the Y spliced
+    # lines) each part
+    def label_keys(self):
+        for r in self.records:
+            labels = set()
+            for col in ['ppp_label', 'lvr_label', 'cavern_ppp_label',
+                        'cavern_lvr_label']:
+                if r[col]=='NA': continue
+                labels.add(norm_label(r[col]))
+                labels.update(norm_label(part) for part in r[col].split('   Y   '))
+            for label in labels: yield (label,), r
+
+    # the PEPIs of a pepi parameter: 'C-bot-mag', 'C' or '' (all of them)
+    def select_pepis(self, pepi):
+        parts = tuple(part for part in re.split(r'[-_ ]', pepi) if part)
+        return [p for p in self.pepis if p[:len(parts)]==parts]
+
+# '22' or 'P20-P24' -> (20, 24)
+def parse_range(value):
+    match = re.fullmatch(r'\s*P?(\d+)\s*(?:-\s*P?(\d+)\s*)?', value, re.IGNORECASE)
+    if match is None: raise ValueError(f'not a number or range: {value}')
+    lo = int(match.group(1))
+    return lo, int(match.group(2) or lo)
+
+# answer one query (path and parameters) from the mapping; returns the
+# matching records
+def answer(m, path, params):
+    pepis = m.select_pepis(params.get('pepi', ''))
+    if path=='/ppp':
+        index = m.ppp_cavern if params.get('as')=='cavern' else m.ppp
+        lo, hi = parse_range(params['pos'])
+        if 'pin' in params:
+            pin_lo, pin_hi = parse_range(params['pin'])
+            return [r for p in pepis for r in
+                    index.range(p + (lo, pin_lo), p + (hi, pin_hi))
+                    if pin_lo <= to_int(r['ppp_pins' if index is m.ppp else
+                                          'cavern_ppp_pin'].split(',')[0]) <= pin_hi]
+        return [r for p in pepis for r in index.range(p + (lo,), p + (hi, math.inf))]
+    if path=='/lvr':
+        lo, hi = parse_range(params['lvr'])
+        if 'ch' in params:
+            ch = parse_range(params['ch'])
+            return [r for p in pepis for lvr in range(lo, hi+1) for r in
+                    m.lvr.range(p + (lvr, ch[0]), p + (lvr, ch[1]))]
+        return [r for p in pepis for r in m.lvr.range(p + (lo,), p + (hi, math.inf))]
+    if path=='/bp':
+        return [r for p in pepis for r in
+                m.bp.prefix(p + (params['bp'],), params.get('con', ''))]
+    if path=='/load':
+        return [r for p in pepis for r in m.load.get(p + (params['load'],))]
+    if path=='/label':
+        text = norm_label(params['text'])
+        if params.get('prefix', '0') not in ['0', 'false']:
+            records = m.label.prefix((), text)
+        else: records = m.label.get((text,))
+        return list({id(r): r for r in records}.values()) # each line once
+    raise KeyError(path)
+
+####### The service
+
+# the inputs of the checks, their settings, the mapping being served and how
+# it was loaded
+class service:
+
+    def __init__(self, files, settings, poll):
+        self.files = files
+        self.settings = settings
+        self.poll = poll
+        self.mapping = None
+        self.loaded = None
+        self.load_seconds = 0
+        self.load_errors = None
+        self.stats = None
+        self.lock = threading.Lock()
+
+    def stat_files(self):
+        stats = []
+        for file in self.files:
+            try:
+                stat = os.stat(file)
+                stats.append((stat.st_mtime, stat.st_size))
+            except OSError: stats.append(None)
+        return stats
+
+    # run the checks and index the corrected mapping; with typos, the cavern
+    # mapping can't be checked, so keep serving the previous mapping
+    def load(self):
+        with self.lock:
+            stats = self.stat_files()
+            start = time.perf_counter()
+            for setting, value in self.settings.items(): setattr(cm, setting, value)
+            session.clear() # the checks change the parsed lines
+            cm.set_parse_funcs(self.files)
+            printout = io.StringIO()
+            with contextlib.redirect_stdout(printout):
+                typos = cm.cavern_typo_check()
+                if typos==0: errors = cm.cavern_check_fix()
+            with open(os.path.join(cm.fixme_dir, 'query_service.log'), 'w') as f:
+                f.write(printout.getvalue())
+            self.stats = stats
+            if typos:
+                self.load_errors = {'typos': typos}
+                print(f'{cm.cavern} has {typos} typos, not reloaded (see '+
+                      f'{cm.fixme_dir}/query_service.log)')
+                return
+            self.mapping = mapping(cm.corrected)
+            self.loaded = datetime.datetime.now().isoformat(timespec='seconds')
+            self.load_seconds = time.perf_counter() - start
+            self.load_errors = errors
+            print(f'Loaded {len(self.mapping.records)} lines from {cm.cavern} in '+
+                  f'{self.load_seconds:.2f} s')
+
+    # reload whenever an input changes
+    def watch(self):
+        while True:
+            time.sleep(self.poll)
+            if self.stat_files() == self.stats: continue
+            try: self.load()
+            except Exception as err: # keep serving the previous mapping
+                self.stats = self.stat_files()
+                self.load_errors = {'error': repr(err)}
+                print(f'Reloading failed: {err!r}')
+
+    def status(self):
+        return {'nominal': cm.nominal, 'cavern': cm.cavern, 'swap': cm.swap_pos,
+                'sides': cm.sides, 'loaded': self.loaded,
+                'load seconds': round(self.load_seconds, 3),
+                'lines': len(self.mapping.records) if self.mapping else 0,
+                'pepis': ['-'.join(p) for p in self.mapping.pepis] if
+                         self.mapping else [],
+                'errors': self.load_errors}
+
+class handler(BaseHTTPRequestHandler):
+
+    service = None
+
+    def do_GET(self):
+        start = time.perf_counter()
+        url = urllib.parse.urlsplit(self.path)
+        params = dict(urllib.parse.parse_qsl(url.query))
+        m = self.service.mapping # whatever is loaded now, even if reloading
+        try:
+            if url.path=='/status': body = self.service.status()
+            elif m is None: return self.reply(503, {'error': 'no mapping loaded',
+                                                    **self.service.status()})
+            else:
+                results = answer(m, url.path, params)
+                body = {'count': len(results), 'results': results,
+                        'loaded': self.service.loaded}
+        except KeyError as err:
+            if err.args[0]==url.path:
+                return self.reply(404, {'error': f'unknown query {url.path}'})
+            return self.reply(400, {'error': f'missing parameter {err}'})
+        except ValueError as err: return self.reply(400, {'error': str(err)})
+        body['ms'] = round(1000*(time.perf_counter() - start), 3)
+        self.reply(200, body)
+
+    def reply(self, code, body):
+        data = json.dumps(body, indent=1).encode()
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args): # quiet; the shifters use a browser
+        return
+
+def main(argv=None):
+    parser = ArgumentParser(description='Serve the corrected cavern mapping for queries over HTTP/JSON')
+    parser.add_argument('nominal', help='specify nominal mapping to be used as input')
+    parser.add_argument('cavern', help='specify cavern mapping to be used as input')
+    parser.add_argument('-swap', '-s', default='NA', help='specify how Posistronix are swapping')
+    parser.add_argument('-compare', action='store_true', help='also check Petr\'s label files in compare')
+    parser.add_argument('-lines', action='store_true', help='also check the cavern mapping LVR-load')
+    parser.add_argument('-side', nargs='+', choices=['C', 'A'], default=['C'], help='specify the sides to serve (C and/or A)')
+    parser.add_argument('-host', default='127.0.0.1', help='specify the address to serve on')
+    parser.add_argument('-port', type=int, default=8765, help='specify the port to serve on')
+    parser.add_argument('-poll', type=float, default=2, help='specify how often (s) to check the inputs for changes')
+    args = parser.parse_args(argv)
+
+    compare = ['compare/'+file for file in os.listdir('compare')] if args.compare else []
+    settings = {'nominal': args.nominal, 'cavern': args.cavern, 'swap_pos': args.swap,
+                'compare': compare, 'check_lines': args.lines,
+                'sides': list(dict.fromkeys(args.side))}
+    files = [args.nominal, args.cavern] + [file for file in [args.swap] if file!='NA']
+    if args.lines: files += [cm.schem_ip, cm.schem_mag]
+    s = service(files + compare, settings, args.poll)
+    s.load()
+    threading.Thread(target=s.watch, daemon=True).start()
+    handler.service = s
+    server = ThreadingHTTPServer((args.host, args.port), handler)
+    print(f'Serving on http://{args.host}:{server.server_address[1]}/ (Ctrl-C to stop)')
+    try: server.serve_forever()
+    except KeyboardInterrupt: pass
+    server.server_close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+# Changelog between two revisions of the (formatted) cavern mapping: the lines
+# of both are matched by everything but their PPP info (like the nominal and
+# cavern lines in check_mappings), and the lines that were added, removed or
+# that have a different PPP, LVR ch, length or label are listed, one row per
+# changed field.
+
+import csv
+from argparse import ArgumentParser
+from .check_mappings import parse_cavern, true_mirror, ppp_ret_pin
+
+changelog_cols = ['Change', 'True/Mir', 'Mag/IP', 'BP', 'BP Con.',
+                  'iBB/P2B2 Con.', 'SBC Flex Name', '4-asic group / DCB power',
+                  'M/S/A', 'Field', 'Old', 'New']
+
+# the fields compared for the lines in both revisions
+fields = {
+    'PPP': lambda l: f'{l.ppp} - {l.ppp_pin}/{ppp_ret_pin(l.ppp_pin)}',
+    'LVR Ch.': lambda l: f'{l.lvr} - {l.lvr_ch}',
+    'C Len (m)': lambda l: l.length_c,
+    'A Len (m)': lambda l: l.length_a,
+    'PPP Label': lambda l: l.ppp_label,
+    'LVR Label': lambda l: l.lvr_label,
+}
+
+# key for matching lines between revisions; lines that share their key (eg.
+# M/S pairs out of one LVR) are matched in the order they appear
+def revision_keys(lines):
+    seen = {}
+    keyed = {}
+    for l in lines:
+        key = l.key_minus_ppp()
+        n = seen.get(key, 0)
+        seen[key] = n+1
+        keyed[(key, n)] = l
+    return keyed
+
+def line_cols(l):
+    return [true_mirror(l.x, l.y, l.z), l.z, l.bp, l.bp_con, l.ibbp2b2, l.flex,
+            l.load, l.msa]
+
+# returns the changelog rows (without header) from the old to the new lines;
+# changed and removed lines are in the order of the old revision, followed by
+# the added lines in the order of the new one
+def diff_lines(old_lines, new_lines):
+    new_keyed = revision_keys(new_lines)
+    rows = []
+    for key, ol in revision_keys(old_lines).items():
+        nl = new_keyed.pop(key, None)
+        if nl is None:
+            rows.append(['Removed'] + line_cols(ol) + ['', '', ''])
+            continue
+        for field, value in fields.items():
+            if value(ol) != value(nl):
+                rows.append(['Changed'] + line_cols(nl) +
+                             [field, value(ol), value(nl)])
+    for nl in new_keyed.values():
+        rows.append(['Added'] + line_cols(nl) + ['', '', ''])
+    return rows
+
+def write_changelog(file, rows):
+    if file.endswith('.xlsx'):
+        import pandas # only needed for the xlsx changelog
+        df = pandas.DataFrame(rows[1:], columns=rows[0])
+        with pandas.ExcelWriter(file, engine='xlsxwriter') as writer:
+            df.to_excel(writer, sheet_name='Changes', index=False)
+            worksheet = writer.sheets['Changes']
+            worksheet.autofilter(0, 0, len(df), len(rows[0])-1)
+            worksheet.freeze_panes(1, 0)
+            worksheet.set_column(0, len(rows[0])-3, 14)
+            worksheet.set_column(len(rows[0])-2, len(rows[0])-1, 40)
+    else:
+        with open(file, 'w') as f:
+            writer = csv.writer(f)
+            for row in rows: writer.writerow(row)
+
+def main(argv=None):
+    parser = ArgumentParser(description='List the changes between two cavern mapping revisions')
+    parser.add_argument('old', help='specify the older formatted cavern mapping')
+    parser.add_argument('new', help='specify the newer formatted cavern mapping')
+    parser.add_argument('-out', '-o', default='fixme/cavern_mapping_changes.csv',
+                        help='specify the changelog file (.csv or .xlsx)')
+    args = parser.parse_args(argv)
+
+    print(f'\n\nChanges from {args.old} to {args.new}...\n\n')
+    rows = diff_lines(parse_cavern(args.old), parse_cavern(args.new))
+    count = {change: sum(1 for row in rows if row[0]==change) for change in
+             ['Added', 'Removed', 'Changed']}
+    print(f'{count["Added"]} lines added, {count["Removed"]} lines removed, '+
+          f'{count["Changed"]} fields changed')
+    write_changelog(args.out, [changelog_cols] + rows)
+    print(f'\nWrote {args.out}')
+
+if __name__ == '__main__':
+    main()
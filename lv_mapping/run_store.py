@@ -0,0 +1,67 @@
+# Local store of per-sheet results for the incremental re-check (see the
+# -incremental option of check_mappings). One store per cavern workbook path;
+# each sheet has an entry that is only kept while the sheet content (see
+# xls_cache.sheet_hashes) is unchanged, holding the sheet's results, each with
+# the dependencies (eg. the hash of the nominal mapping) it was made from.
+
+import os, hashlib, pickle
+from . import xls_cache
+
+# bump when the stored results change format, to drop old stores
+version = 4
+
+runs_dir = os.path.join(xls_cache.cache_dir, 'runs')
+
+class run_store:
+
+    def __init__(self, file):
+        self.file = file
+        path_hash = hashlib.sha1(os.path.abspath(file).encode()).hexdigest()[:12]
+        self.path = os.path.join(runs_dir, path_hash+'.pkl')
+        self.sheets = {} # sheet -> {'hash':, 'results': {name: (deps, value)}}
+        self.results = {} # name -> (deps, value), for results of many sheets
+        if os.path.isfile(self.path):
+            try:
+                with open(self.path, 'rb') as f: stored = pickle.load(f)
+                if stored['version'] == version:
+                    self.sheets, self.results = stored['sheets'], stored['results']
+            except Exception: pass # broken store; just start over
+        # count of re-made vs re-used results, for the summary
+        self.made = 0
+        self.reused = 0
+
+    # the entry for sheet; emptied if the sheet content changed
+    def entry(self, sheet, sheet_hash):
+        entry = self.sheets.get(sheet)
+        if entry is None or entry['hash'] != sheet_hash:
+            entry = {'hash': sheet_hash, 'results': {}}
+            self.sheets[sheet] = entry
+        return entry
+
+    # return the result stored under name if made from the same deps, or make
+    # (and store) it; results is either an entry's results or self.results
+    def result(self, results, name, deps, make):
+        if name in results and results[name][0] == deps:
+            self.reused += 1
+            return results[name][1]
+        self.made += 1
+        value = make()
+        results[name] = (deps, value)
+        return value
+
+    def sheet_result(self, entry, name, deps, make):
+        return self.result(entry['results'], name, deps, make)
+
+    def store_result(self, name, deps, make):
+        return self.result(self.results, name, deps, make)
+
+    # drop the sheets that aren't in the workbook anymore, and write the store
+    def save(self, sheets):
+        self.sheets = {sheet: self.sheets[sheet] for sheet in sheets
+                       if sheet in self.sheets}
+        os.makedirs(runs_dir, exist_ok=True)
+        tmp = f'{self.path}.{os.getpid()}.tmp'
+        with open(tmp, 'wb') as f:
+            pickle.dump({'version': version, 'sheets': self.sheets,
+                         'results': self.results}, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self.path) # don't leave half-written stores around
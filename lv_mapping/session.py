@@ -0,0 +1,35 @@
+# Per-process session of the parsed inputs: each input file is parsed once per
+# parser, by whichever check (or command) asks for it first, and all the later
+# stages share the result; eg. the typo check and check_fix use the same
+# nominal and cavern lines, and the cavern workbook is only parsed once however
+# many of its sheets are needed. Results are keyed by the file content (see
+# xls_cache.file_hash), so an edited file is parsed again. The sheets
+# themselves come from the on-disk cache (xls_cache), so a file is only decoded
+# from Excel once, ever, until it changes.
+# The checks modify some of what they're given (eg. the LVR info of the matched
+# nominal lines), so each check_mappings run starts a new session.
+
+import os
+from . import xls_cache
+
+# (path, sha1, parser) -> parsed
+results = {}
+
+def parse(file, parser):
+    key = (os.path.abspath(file), xls_cache.file_hash(file), parser.__module__,
+           parser.__qualname__)
+    if not key in results: results[key] = parser(file)
+    return results[key]
+
+def clear():
+    results.clear()
+
+# set in the worker processes of a pool (eg. of the batch revisions, or of the
+# sides), which do their share of the work one thing after the other instead
+# of starting pools of their own
+in_pool = False
+
+# if units of work should be shared out to a pool of worker processes: only if
+# there's more than one, and this process isn't a pool worker already
+def use_pool(units):
+    return units > 1 and not in_pool
@@ -0,0 +1,175 @@
+# Positronic swap planner: instead of working out formatted_cavern/
+# swap_positronic.xlsx by hand, find which PPP slot each cavern Positronic
+# should be moved to so that as many Positronics as possible have the same pins
+# populated as the corrected (nominal) mapping has in their new slot, and, of
+# those plans, the one that leaves the most lines at their correct PPP pin (so
+# the fewest labels to move). Moving Positronic p to slot q scores
+#   (pins of p == pins of nominal q) * (lines + 1) + (lines of p correct at q)
+# which is an assignment problem (cavern Positronics x slots), solved per PEPI
+# with the Hungarian algorithm (O(n^3) in the Positronics of a PEPI, so well
+# under a second for all eight PEPIs). Ties are broken towards not moving.
+# The plan is written as a swap workbook with one sheet per PEPI (see
+# check_mappings.parse_swap_pos), then the checks are run with it, so that
+# fixme/move_labels.csv (and the other reports) are those of the plan.
+#
+# python -m lv_mapping plan <nominal> <cavern> (-side C A) (-pepi C-bot-mag ...)
+#     (-o formatted_cavern/swap_positronic_planned.xlsx)
+
+import re, time
+from argparse import ArgumentParser
+from . import session
+from . import check_mappings as cm
+
+# the assignment of rows to columns with the smallest total cost (rows <=
+# columns), with the Hungarian algorithm (shortest augmenting paths, with row
+# and column potentials); returns the column of each row
+def hungarian(cost):
+    n, m = len(cost), len(cost[0])
+    inf = float('inf')
+    u = [0]*(n+1) # row potentials
+    v = [0]*(m+1) # column potentials
+    row_of = [0]*(m+1) # row assigned to each column (1-indexed, 0 = none)
+    way = [0]*(m+1)
+    for i in range(1, n+1):
+        row_of[0] = i
+        j0 = 0
+        minv = [inf]*(m+1)
+        used = [False]*(m+1)
+        while True:
+            used[j0] = True
+            i0, delta, j1 = row_of[j0], inf, 0
+            row = cost[i0-1]
+            for j in range(1, m+1):
+                if used[j]: continue
+                cur = row[j-1] - u[i0] - v[j]
+                if cur < minv[j]: minv[j], way[j] = cur, j0
+                if minv[j] < delta: delta, j1 = minv[j], j
+            for j in range(m+1):
+                if used[j]:
+                    u[row_of[j]] += delta
+                    v[j] -= delta
+                else: minv[j] -= delta
+            j0 = j1
+            if row_of[j0] == 0: break
+        while j0: # flip the augmenting path
+            j1 = way[j0]
+            row_of[j0] = row_of[j1]
+            j0 = j1
+    assignment = [0]*n
+    for j in range(1, m+1):
+        if row_of[j]: assignment[row_of[j]-1] = j-1
+    return assignment
+
+ppp_number = re.compile(r'P(\d+)$')
+
+# Positronic # -> {pin: lines} of the lines of one PEPI (the lines that
+# aren't on a Positronic are left out)
+def positronic_pins(lines):
+    positronics = {}
+    for l in lines:
+        match = ppp_number.match(l.ppp)
+        if match is None: continue
+        positronics.setdefault(int(match.group(1)), {}).setdefault(l.ppp_pin, []).append(l)
+    return positronics
+
+# plan the swaps of one PEPI, from its (cav line, nom line) pairs and its
+# nominal lines; returns the swap sheet rows (one per cavern Positronic), and
+# the number of Positronics with matching pins and of lines at their correct
+# PPP pin, before and after the swaps
+def plan_pepi(pairs, nominal_lines):
+    cavern = positronic_pins(cl for cl, nl in pairs)
+    nominal = positronic_pins(nominal_lines)
+    # where each cavern line should be, by Positronic and pin
+    correct = {}
+    for cl, nl in pairs:
+        match = ppp_number.match(nl.ppp)
+        if match: correct[id(cl)] = (int(match.group(1)), nl.ppp_pin)
+    rows = sorted(cavern)
+    slots = sorted(set(cavern) | set(nominal))
+    full = len(pairs) + 1
+    def score(p, q):
+        pins_match = set(cavern[p]) == set(nominal.get(q, {}))
+        right = sum(1 for pin, lines in cavern[p].items() for l in lines
+                    if correct.get(id(l)) == (q, pin))
+        return pins_match*full + right
+    scores = [[score(p, q) for q in slots] for p in rows]
+    # maximize the score (twice, +1 for staying put) = minimize its negative
+    cost = [[-(2*s + (p == q)) for q, s in zip(slots, row)]
+            for p, row in zip(rows, scores)]
+    assignment = hungarian(cost) if rows else []
+    swap_rows = []
+    before, after = [0, 0], [0, 0]
+    for i, p in enumerate(rows):
+        q = slots[assignment[i]]
+        s = scores[i][assignment[i]]
+        stay = scores[i][slots.index(p)]
+        pins_match = s >= full
+        swap_rows.append([p, len(cavern[p]), len(nominal.get(p, {})), q,
+                          'Yes' if q in nominal else 'No',
+                          'Yes' if pins_match else 'No'])
+        after[0] += pins_match
+        after[1] += s % full
+        before[0] += stay >= full
+        before[1] += stay % full
+    return swap_rows, before, after
+
+swap_cols = ['Positronic', 'Old Pin Pop', 'New Pin Pop', 'Swap to',
+             'PPP Slot Filled', 'Pins Match']
+
+# plan the swaps of each PEPI (x, y, z) given; returns the map from the swap
+# sheet name (eg. 'C-bot-mag') to its rows, header first
+def plan_swaps(pairs, nominal_lines, pepis):
+    pepi_pairs, pepi_nominal = {}, {}
+    for cl, nl in pairs: pepi_pairs.setdefault((cl.x, cl.y, cl.z), []).append((cl, nl))
+    for nl in nominal_lines: pepi_nominal.setdefault((nl.x, nl.y, nl.z), []).append(nl)
+    sheets = {}
+    for pepi in pepis:
+        rows, before, after = plan_pepi(pepi_pairs.get(pepi, []),
+                                        pepi_nominal.get(pepi, []))
+        moves = sum(1 for r in rows if r[0] != r[3])
+        print(f'{"-".join(pepi)}: {moves} Positronics moved; Positronics with '+
+              f'matching pins {before[0]} -> {after[0]} (of {len(rows)}), lines '+
+              f'at the correct PPP pin {before[1]} -> {after[1]}')
+        sheets['-'.join(pepi)] = [swap_cols] + rows
+    return sheets
+
+def main(argv=None):
+    parser = ArgumentParser(description='Plan the Positronic swaps that best fix the cavern mapping')
+    parser.add_argument('nominal', help='specify nominal mapping to be used as input')
+    parser.add_argument('cavern', help='specify cavern mapping to be used as input')
+    parser.add_argument('-side', nargs='+', choices=['C', 'A'], default=['C'], help='specify the sides to plan (C and/or A)')
+    parser.add_argument('-pepi', nargs='+', default=None, help='only plan these PEPIs (eg. C-bot-mag); all the PEPIs of the sides by default')
+    parser.add_argument('-out', '-o', default='formatted_cavern/swap_positronic_planned.xlsx', help='specify the swap workbook to write')
+    args = parser.parse_args(argv)
+
+    cm.nominal, cm.cavern, cm.swap_pos = args.nominal, args.cavern, 'NA'
+    cm.sides = list(dict.fromkeys(args.side))
+    session.clear() # the checks change the parsed lines
+    cm.set_parse_funcs([cm.nominal, cm.cavern])
+    pepis = [(x, y, z) for x in cm.sides for y in ['top', 'bot'] for z in ['ip', 'mag']]
+    if args.pepi is not None:
+        pepis = [pepi for pepi in pepis if '-'.join(pepi) in args.pepi]
+    if cm.cavern_typo_check() != 0:
+        print('\nFix the typos before planning the swaps')
+        return 1
+
+    print(f'\n\nPlanning the Positronic swaps of {cm.cavern}...\n\n')
+    start = time.perf_counter()
+    nominal_lines = cm.side_nominal_lines(cm.parse_input(cm.nominal))
+    cavern_lines = [l for l in cm.parse_input(cm.cavern) if l.x in cm.sides]
+    nominal_index = cm.index_lines(nominal_lines, cm.line.key_minus_ppp)
+    pairs = cm.match_nominal_lines(cavern_lines, nominal_index)[0]
+    sheets = plan_swaps(pairs, nominal_lines, pepis)
+    print(f'\nPlanned in {time.perf_counter() - start:.2f} s')
+    cm.write_xlsx(args.out, sheets)
+    print(f'Wrote {args.out}')
+
+    # the reports (move_labels.csv, ...) with the planned swaps
+    session.clear()
+    cm.swap_pos = args.out
+    cm.set_parse_funcs([cm.nominal, cm.cavern])
+    cm.parse_func[cm.swap_pos] = cm.swap_table # whatever the file is called
+    cm.cavern_check_fix()
+
+if __name__ == '__main__':
+    main()
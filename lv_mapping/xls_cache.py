@@ -0,0 +1,141 @@
+# On-disk cache for the sheets read out of the Excel workbooks. Almost all of
+# the time spent reading the mappings goes into decoding the xlsx XML, so the
+# first read of each sheet is pickled and re-used by later runs for as long as
+# the workbook content is unchanged (entries are keyed by the sha1 of the file,
+# so editing a workbook invalidates its cached sheets automatically).
+# Used by both parse_xls and check_mappings; cached() also works for
+# anything else parsed from a file (eg. the netlists). Within one process, the
+# parsed inputs are also kept in memory (see session.py).
+
+import os, re, hashlib, pickle, shutil, zipfile
+import xml.etree.ElementTree as ElementTree
+
+# relative to where the scripts are run from, like output/ and fixme/
+cache_dir = '.xls_cache'
+
+# workbooks are only opened (and decoded) on a cache miss
+workbooks = {}
+# path -> (mtime, size, sha1), so each file is only hashed once per run
+file_hashes = {}
+
+# sha1 of the file content; used as the cache key
+def file_hash(file):
+    stat = os.stat(file)
+    if file in file_hashes and file_hashes[file][:2] == (stat.st_mtime, stat.st_size):
+        return file_hashes[file][2]
+    sha = hashlib.sha1()
+    with open(file, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''): sha.update(chunk)
+    file_hashes[file] = (stat.st_mtime, stat.st_size, sha.hexdigest())
+    return file_hashes[file][2]
+
+# directory holding the cached sheets of this version of the workbook; the
+# cache for older versions of the same workbook is deleted when a new one is
+# made
+def workbook_cache_dir(file):
+    path_hash = hashlib.sha1(os.path.abspath(file).encode()).hexdigest()[:12]
+    wb_dir = os.path.join(cache_dir, f'{path_hash}-{file_hash(file)}')
+    if not os.path.isdir(wb_dir):
+        if os.path.isdir(cache_dir):
+            for old_dir in os.listdir(cache_dir):
+                if old_dir.startswith(path_hash+'-'):
+                    shutil.rmtree(os.path.join(cache_dir, old_dir),
+                                  ignore_errors=True)
+        os.makedirs(wb_dir, exist_ok=True)
+    return wb_dir
+
+# pandas is only imported on a cache miss (unpickling a cached sheet imports
+# it anyway, but the netlists don't need it at all)
+def open_workbook(file):
+    import pandas
+    if not file in workbooks: workbooks[file] = pandas.ExcelFile(file)
+    return workbooks[file]
+
+def entry_path(file, name):
+    return os.path.join(workbook_cache_dir(file), name+'.pkl')
+
+# the object stored under name, or missing if there's none (or it's broken)
+missing = object()
+def load(file, name):
+    entry = entry_path(file, name)
+    if os.path.isfile(entry):
+        try:
+            with open(entry, 'rb') as f: return pickle.load(f)
+        except Exception: pass # broken entry; just re-make it
+    return missing
+
+def store(file, name, obj):
+    entry = entry_path(file, name)
+    tmp = f'{entry}.{os.getpid()}.tmp'
+    with open(tmp, 'wb') as f: pickle.dump(obj, f, pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, entry) # don't leave half-written entries around
+
+# return the cached object stored under name, or make (and store) it
+def cached(file, name, make):
+    obj = load(file, name)
+    if obj is missing:
+        obj = make()
+        store(file, name, obj)
+    return obj
+
+def sheet_names(file):
+    return cached(file, 'sheet_names', lambda: open_workbook(file).sheet_names)
+
+def sheet_entry(sheet, kwargs):
+    args = repr((sheet, sorted(kwargs.items())))
+    return 'sheet_' + hashlib.sha1(args.encode()).hexdigest()
+
+# drop-in for pandas.read_excel(file, sheet, **kwargs)
+def read_excel(file, sheet, **kwargs):
+    return cached(file, sheet_entry(sheet, kwargs),
+                  lambda: open_workbook(file).parse(sheet, **kwargs))
+
+# drop-in for pandas.read_excel(file, sheets, **kwargs), ie. for reading
+# several sheets (all of them if sheets is None) the same way; returns the map
+# from sheet to data frame. the sheets that aren't cached yet are all read in
+# one go
+def read_sheets(file, sheets=None, **kwargs):
+    if sheets is None: sheets = sheet_names(file)
+    frames = {sheet: load(file, sheet_entry(sheet, kwargs)) for sheet in sheets}
+    to_read = [sheet for sheet in sheets if frames[sheet] is missing]
+    if to_read:
+        for sheet, frame in open_workbook(file).parse(to_read, **kwargs).items():
+            store(file, sheet_entry(sheet, kwargs), frame)
+            frames[sheet] = frame
+    return frames
+
+# sha1 of the content of each sheet, read straight from the xlsx XML (without
+# decoding the cells), so that the sheets that changed between two versions of
+# a workbook can be found cheaply. the shared string indices in the sheet XML
+# are replaced by the strings themselves, as adding a string anywhere in the
+# workbook renumbers them
+def sheet_hashes(file):
+    return cached(file, 'sheet_hashes', lambda: hash_sheets(file))
+
+ns_main = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+ns_rel = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+ns_pkg_rel = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+shared_string_cell = re.compile(rb'(<c [^>]*t="s"[^>]*>)<v>(\d+)</v>')
+
+def hash_sheets(file):
+    hashes = {}
+    with zipfile.ZipFile(file) as xlsx:
+        names = set(xlsx.namelist())
+        rels = ElementTree.fromstring(xlsx.read('xl/_rels/workbook.xml.rels'))
+        targets = {}
+        for rel in rels.iter(ns_pkg_rel+'Relationship'):
+            target = rel.get('Target')
+            targets[rel.get('Id')] = target[1:] if target.startswith('/') else \
+                                     'xl/'+target
+        strings = []
+        if 'xl/sharedStrings.xml' in names:
+            sst = ElementTree.fromstring(xlsx.read('xl/sharedStrings.xml'))
+            for si in sst.iter(ns_main+'si'):
+                strings.append(''.join(t.text or '' for t in si.iter(ns_main+'t')))
+        wb = ElementTree.fromstring(xlsx.read('xl/workbook.xml'))
+        for sheet in wb.iter(ns_main+'sheet'):
+            xml = xlsx.read(targets[sheet.get(ns_rel+'id')])
+            xml = shared_string_cell.sub(lambda m: m.group(1)+b'<is>'+
+                        strings[int(m.group(2))].encode()+b'</is>', xml)
+            hashes[sheet.get('name')] = hashlib.sha1(xml).hexdigest()
+    return hashes